@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""This script creates the control-variate estimates of the mean quantities of interest."""
+import argparse
+import pickle as pkl
+
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import SPECS
+from uq_statistics import get_control_variate_estimate
+from uq_surrogate import get_multi_indices
+from uq_surrogate import standardize
+from uq_surrogate import get_basis
+from uq_registry import get_input_table
+
+
+def run(args):
+
+    df = get_input_table(args.table)
+    mean, sd = df["true"].values, df["sd"].values
+
+    # The controls are the non-constant terms of the Hermite expansion of the inputs. They
+    # have an expectation of zero and are free to evaluate. The first order corresponds to a
+    # linearization of the quantities around the mean of the parameters.
+    samples = np.load("mc_samples.uq.npy")
+    multi_indices = get_multi_indices(len(mean), args.order)
+    controls = get_basis(standardize(samples, mean, sd), multi_indices)[:, 1:]
+
+    quantity = pd.read_pickle("mc_quantity.uq.pkl")
+
+    rslt = pd.DataFrame(
+        [get_control_variate_estimate(quantity[column].values, controls)
+         for column in quantity.columns],
+        index=quantity.columns,
+    )
+
+    # We store the estimates together with the setup in a plain dictionary.
+    with open("control_variates.uq.pkl", "wb") as outfile:
+        pkl.dump({"estimates": rslt, "order": args.order, "draws": len(samples)}, outfile)
+
+    print(rslt.to_string(float_format="{:8.4f}".format))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create control-variate estimates for UQ.")
+
+    parser.add_argument("-o", "--order", action="store", dest="order", default=1, type=int,
+                        help="set order of the Hermite terms used as controls")
+
+    parser.add_argument("-t", "--table", action="store", dest="table", default="table41_kw_94",
+                        choices=list(SPECS.values()), help="set input table of the draws")
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""This script creates the Gaussian process emulator with an active-learning design."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+from functools import partial
+import argparse
+import pickle as pkl
+
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import get_quantities_of_interest
+from uq_auxiliary import get_spec_table
+from uq_auxiliary import init_worker
+from uq_auxiliary import SPECS
+from uq_emulator import predict_emulator
+from uq_emulator import get_active_batch
+from uq_emulator import CANDIDATE_SCALE
+from uq_emulator import fit_emulator
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+
+
+def get_convergence_record(emulator, z_reference, num_simulations):
+    """Summarize the uncertainty in the quantity implied by the current emulator.
+
+    The reference draws from the input distribution are propagated through the emulator
+    instead of the model. The average predictive standard deviation measures how much the
+    emulator itself is still uncertain.
+    """
+    mean, variance = predict_emulator(emulator, z_reference)
+    q05, q50, q95 = np.quantile(mean, [0.05, 0.5, 0.95])
+
+    return {
+        "simulations": num_simulations,
+        "mean": mean.mean(),
+        "sd": mean.std(),
+        "q0.05": q05,
+        "q0.5": q50,
+        "q0.95": q95,
+        "emulator_sd": np.sqrt(variance.mean()),
+    }
+
+
+def run(args):
+
+    df = get_spec_table(args.spec)
+    mean, sd = df["true"].values, np.abs(df["sd"].values)
+
+    # All points are handled on the standardized scale and only transformed to parameters for
+    # the evaluation of the model.
+    np.random.seed(args.seed)
+    z_reference = np.random.normal(size=(args.num_reference, len(mean)))
+    z = np.random.normal(size=(args.num_initial, len(mean)))
+
+    history, evals, emulator = list(), np.empty(0), None
+
+    # The evaluations need to use the simulate function of the requested specification.
+    evaluate = partial(get_quantities_of_interest, tuition_subsidies=[500.0],
+                       quantities=["avg_schooling"], spec=args.spec)
+
+    initargs = (args.num_agents, [500.0], args.cache, None, ["avg_schooling"], [args.spec])
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        batch = z
+        while True:
+            samples = mean + batch * sd
+            rslt = map_ordered(imap_unordered, evaluate, samples)
+            evals = np.append(evals, [quantity[("avg_schooling", 500.0)] for quantity in rslt])
+
+            theta = None if emulator is None else emulator["theta"]
+            emulator = fit_emulator(z, evals, theta)
+
+            history.append(get_convergence_record(emulator, z_reference, len(evals)))
+            record = list(history[-1].items())[1:]
+            print(f"{len(evals):6d} " + " ".join(f"{key} {value:8.4f}" for key, value in record))
+
+            if len(evals) >= args.num_simulations:
+                break
+
+            # We select the next batch among fresh candidates, so that the design is not
+            # restricted to a fixed grid.
+            candidates = CANDIDATE_SCALE * np.random.normal(size=(args.num_candidates, len(mean)))
+            batch_size = min(args.batch_size, args.num_simulations - len(evals))
+            batch = candidates[get_active_batch(emulator, candidates, batch_size)]
+            z = np.vstack((z, batch))
+
+    history = pd.DataFrame(history).set_index("simulations")
+    history.to_pickle("emulator_convergence.uq.pkl")
+
+    emulator.update({"mean": mean, "sd": sd, "samples": mean + z * sd, "evals": evals})
+    with open("emulator.uq.pkl", "wb") as outfile:
+        pkl.dump(emulator, outfile)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create emulator for UQ analysis.")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
+                        help="set seed for the analysis")
+
+    parser.add_argument("-n", "--simulations", action="store", dest="num_simulations",
+                        default=100, type=int, help="set total number of model evaluations")
+
+    parser.add_argument("--initial", action="store", dest="num_initial", default=20, type=int,
+                        help="set number of random draws in the initial design")
+
+    parser.add_argument("--batch-size", action="store", dest="batch_size", default=4, type=int,
+                        help="set number of points selected and evaluated at once")
+
+    parser.add_argument("--candidates", action="store", dest="num_candidates", default=2000,
+                        type=int, help="set number of candidates for each selection")
+
+    parser.add_argument("--reference", action="store", dest="num_reference", default=10000,
+                        type=int, help="set number of draws propagated through the emulator")
+
+    parser.add_argument("--spec", action="store", dest="spec", default="kw_94_one",
+                        choices=list(SPECS), help="set KW94 specification")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("-a", "--agents", action="store", dest="num_agents", default=None,
+                        type=int, help="set number of simulated agents")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""This script creates the multilevel Monte Carlo estimate of the quantity of interest."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+import argparse
+import pickle as pkl
+
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import get_spec_table
+from uq_auxiliary import init_worker
+from uq_auxiliary import SPECS
+from uq_multilevel import get_multilevel_estimate
+from uq_multilevel import get_optimal_allocation
+from uq_multilevel import get_level_difference
+from uq_multilevel import get_level_costs
+from uq_multilevel import get_level_options
+from uq_statistics import get_target_standard_error
+from uq_executor import get_executor
+from uq_executor import BACKENDS
+from uq_sampling import get_samples
+
+
+def run(args):
+
+    import chaospy as cp
+
+    levels = get_level_options(args.level_agents, args.level_interpolation)
+    target_se = get_target_standard_error(args.target_se, args.target_width)
+
+    df = get_spec_table(args.spec)
+    mean, cov = df["true"].values, np.diag((df["sd"] ** 2).values)
+
+    np.random.seed(args.seed)
+    distribution = cp.MvNormal(loc=mean, scale=cov)
+
+    # We start with a few pilot draws on each level and then repeatedly add the draws that the
+    # current estimates of the variances and costs call for.
+    differences, costs = [list() for _ in levels], [list() for _ in levels]
+    num_new = np.full(len(levels), args.num_pilot)
+
+    # The workers set up the simulate function of each level on first use.
+    initargs = (None, [args.subsidy], args.cache, None, ["avg_schooling"], [])
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        while num_new.sum() > 0:
+            tasks = list()
+            for level, num_draws in enumerate(num_new):
+                if num_draws == 0:
+                    continue
+                coarse = levels[level - 1] if level > 0 else None
+                for sample in get_samples(distribution, num_draws, "random"):
+                    key = (level, len(tasks))
+                    tasks.append((key, sample, args.spec, args.subsidy, levels[level], coarse))
+
+            rslt = imap_unordered(get_level_difference, tasks, args.task_chunk_size)
+            for (level, _), (difference, cost) in rslt:
+                differences[level].append(difference)
+                if cost is not None:
+                    costs[level].append(cost)
+
+            variances = [np.var(values, ddof=1) for values in differences]
+            allocation = get_optimal_allocation(variances, get_level_costs(costs), target_se)
+            allocation = np.minimum(allocation, args.max_draws)
+
+            num_new = np.maximum(0, allocation - [len(values) for values in differences])
+
+    estimate, se = get_multilevel_estimate(differences)
+
+    rslt = pd.DataFrame(levels)
+    rslt.index.name = "level"
+    rslt["draws"] = [len(values) for values in differences]
+    rslt["mean"] = [np.mean(values) for values in differences]
+    rslt["variance"] = [np.var(values, ddof=1) for values in differences]
+    rslt["cost"] = [np.mean(values) if values else np.nan for values in costs]
+
+    # We store the levels together with the estimate in a plain dictionary.
+    with open("multilevel.uq.pkl", "wb") as outfile:
+        pkl.dump({"levels": rslt, "estimate": estimate, "se": se, "spec": args.spec}, outfile)
+
+    print(rslt.to_string(float_format="{:10.6f}".format))
+    print(f"Estimate {estimate:.4f}, standard error {se:.4f}, "
+          f"cost {sum(np.sum(values) for values in costs):.1f} seconds")
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create multilevel estimate for UQ analysis.")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
+                        help="set seed for the analysis")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("--spec", action="store", dest="spec", default="kw_94_one",
+                        choices=list(SPECS), help="set KW94 specification")
+
+    parser.add_argument("--subsidy", action="store", dest="subsidy", default=500.0,
+                        type=float, help="set tuition subsidy to evaluate")
+
+    parser.add_argument("--level-agents", action="store", dest="level_agents",
+                        default=[100, 300, 1000], type=int, nargs="+",
+                        help="set number of simulated agents from the coarsest to the finest level")
+
+    parser.add_argument("--level-interpolation", action="store", dest="level_interpolation",
+                        default=None, type=int, nargs="+",
+                        help="set number of interpolation points of each level, -1 for exact")
+
+    parser.add_argument("--pilot", action="store", dest="num_pilot", default=10, type=int,
+                        help="set number of pilot draws on each level")
+
+    parser.add_argument("--max-draws", action="store", dest="max_draws", default=10000,
+                        type=int, help="set maximum number of draws on each level")
+
+    parser.add_argument("--target-se", action="store", dest="target_se", default=0.01,
+                        type=float, help="set standard error of the estimate")
+
+    parser.add_argument("--target-width", action="store", dest="target_width", default=None,
+                        type=float, help="set width of the 95%% interval of the estimate")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--task-chunk-size", action="store", dest="task_chunk_size", default=1,
+                        type=int, help="set number of draws handed to a worker at once")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    # The allocation needs the variance of the differences on each level.
+    if args.num_pilot < 2:
+        parser.error("--pilot needs to be at least 2")
+
+    if args.level_interpolation is not None:
+        if len(args.level_interpolation) != len(args.level_agents):
+            parser.error("--level-interpolation needs one value for each level")
+
+    run(args)
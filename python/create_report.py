@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""This script creates a numeric summary of the stored quantities of interest."""
+import argparse
+import json
+
+import pandas as pd
+import numpy as np
+
+from uq_statistics import get_bootstrap_exceedances
+from uq_statistics import get_bootstrap_quantiles
+from uq_statistics import get_order_statistics
+from uq_statistics import get_bootstrap_moments
+
+
+def get_label(column):
+    """Turn a column of the stored quantities into a readable label."""
+    if isinstance(column, tuple):
+        return "/".join(f"{level:g}" if isinstance(level, float) else str(level)
+                        for level in column)
+
+    return str(column)
+
+
+def get_report(quantity, quantiles, thresholds, num_bootstrap=1000, alpha=0.05, seed=123):
+    """Collect the estimates and bootstrap confidence intervals of all summary statistics.
+
+    The result is indexed by the quantity and the statistic.
+    """
+    values = quantity.values.astype(float)
+    labels = [get_label(column) for column in quantity.columns]
+
+    mean, variance = get_bootstrap_moments(values, num_bootstrap, seed)
+    replicates = {"mean": mean, "variance": variance}
+    estimates = {"mean": values.mean(axis=0), "variance": values.var(axis=0, ddof=1)}
+
+    sorted_values = np.sort(values, axis=0)
+    positions = get_order_statistics(len(values), quantiles)
+    rslt = get_bootstrap_quantiles(values, quantiles, num_bootstrap, seed)
+    for i, q in enumerate(quantiles):
+        replicates[f"q{q:g}"] = rslt[:, i]
+        estimates[f"q{q:g}"] = sorted_values[positions[i]]
+
+    rslt = get_bootstrap_exceedances(values, thresholds, num_bootstrap, seed)
+    for i, threshold in enumerate(thresholds):
+        replicates[f"P(>{threshold:g})"] = rslt[:, i]
+        estimates[f"P(>{threshold:g})"] = np.mean(values > threshold, axis=0)
+
+    # We use the percentile intervals of the bootstrap replicates.
+    records = list()
+    for j, label in enumerate(labels):
+        for statistic in replicates:
+            lower, upper = np.quantile(replicates[statistic][:, j], [alpha / 2, 1 - alpha / 2])
+            records.append({
+                "quantity": label,
+                "statistic": statistic,
+                "estimate": estimates[statistic][j],
+                "lower": lower,
+                "upper": upper,
+            })
+
+    return pd.DataFrame(records).set_index(["quantity", "statistic"])
+
+
+def run(args):
+
+    quantity = pd.read_pickle(args.input)
+    if isinstance(quantity, pd.Series):
+        quantity = quantity.to_frame()
+
+    rslt = get_report(quantity, args.quantiles, args.thresholds, args.num_bootstrap, args.alpha,
+                      args.seed)
+
+    print(f"Draws {len(quantity)}, {args.num_bootstrap} bootstrap replicates, "
+          f"{1 - args.alpha:.0%} intervals")
+    print(rslt.to_string(float_format="{:10.4f}".format))
+
+    report = {
+        "draws": len(quantity),
+        "num_bootstrap": args.num_bootstrap,
+        "alpha": args.alpha,
+        "statistics": rslt.reset_index().to_dict(orient="records"),
+    }
+    with open(args.json, "w") as outfile:
+        json.dump(report, outfile, indent=4)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create report of UQ analysis.")
+
+    parser.add_argument("-i", "--input", action="store", dest="input",
+                        default="mc_quantity.uq.pkl", help="set file of the stored quantities")
+
+    parser.add_argument("-q", "--quantiles", action="store", dest="quantiles",
+                        default=[0.05, 0.5, 0.95], type=float, nargs="+",
+                        help="set quantiles to report")
+
+    parser.add_argument("-t", "--thresholds", action="store", dest="thresholds", default=[0.0],
+                        type=float, nargs="+", help="set thresholds of exceedance probabilities")
+
+    parser.add_argument("-b", "--bootstrap", action="store", dest="num_bootstrap", default=1000,
+                        type=int, help="set number of bootstrap replicates")
+
+    parser.add_argument("--alpha", action="store", dest="alpha", default=0.05, type=float,
+                        help="set level of the confidence intervals")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
+                        help="set seed for the bootstrap")
+
+    parser.add_argument("--json", action="store", dest="json", default="report.uq.json",
+                        help="set file of the JSON report")
+
+    args = parser.parse_args()
+
+    run(args)
@@ -13,67 +13,229 @@ update = {
 }
 os.environ.update(update)
 
-import multiprocessing as mp
 import argparse
 
-import chaospy as cp
 import pandas as pd
 import numpy as np
-import respy as rp
 
-from uq_auxiliary import transform_params_kw94_respy
-from uq_auxiliary import get_quantity_of_interest
-from uq_auxiliary import model_wrapper_kw_94
-from uq_configurations import INPUT_DIR
+from uq_auxiliary import transform_params_kw94_respy_batch
+from uq_auxiliary import get_quantity_of_interest_iteration
+from uq_auxiliary import get_policy_effects
+from uq_auxiliary import drop_single_subsidy
+from uq_auxiliary import get_spec_table
+from uq_auxiliary import init_worker
+from uq_auxiliary import QUANTITIES
+from uq_auxiliary import SPECS
+from uq_executor import get_executor
+from uq_executor import BACKENDS
+from uq_storage import resume_chunks
+from uq_storage import reset_chunks
+from uq_storage import write_chunk
+from uq_storage import save_mc_params
+from uq_storage import load_chunks
+from uq_statistics import get_target_standard_error
+from uq_statistics import update_streaming_moments
+from uq_statistics import get_streaming_moments
+from uq_statistics import get_standard_error
+from uq_timing import start_trace
+from uq_sampling import get_samples
+from uq_sampling import SAMPLERS
+from uq_registry import get_example_model
+from uq_registry import get_simulate_func
 from uq_configurations import RSLT_DIR
 
 
-def run(args):
+def get_quantity_chunk(rslt):
+    """Collect pairs of key and quantities in a DataFrame for the chunk store.
+
+    Each row holds all statistics for all subsidies of a single draw and is indexed by the
+    specification and the iteration.
+    """
+    keys, quantities = zip(*rslt)
+
+    df = pd.concat(quantities, axis=1, keys=pd.MultiIndex.from_tuples(keys)).T
+    df.columns.names = ['quantity', 'tuition_subsidy']
+    df.index.names = ['spec', 'iteration']
+
+    return df
+
+
+def get_target_values(quantity, target):
+    """Select the values of the statistic that determines the precision of the run."""
+    return quantity.xs(target, level="quantity").to_numpy()
 
-    # We need to take stock for baseline parameters and store them for future processing.
-    base_params, base_options = rp.get_example_model("kw_94_one", with_data=False)
-    policy_edu, _ = model_wrapper_kw_94(base_params, base_options, 500)
-    base_edu, _ = model_wrapper_kw_94(base_params, base_options, 0)
-    base_quantity = policy_edu - base_edu
 
-    base_quantity = pd.DataFrame(base_quantity, columns=['avg_schooling'], index=[0])
-    base_quantity.to_pickle(RSLT_DIR / "base_quantity.uq.pkl")
-    base_params.to_pickle(RSLT_DIR / "base_params.uq.pkl")
+def get_spec_setup(spec, seed, num_draws, sampler, table=None):
+    """Draw the points of evaluation from the distribution of a specification's parameters.
+
+    We only import chaospy here, as it takes long to load and is not needed for the command
+    line interface. All specifications use the same seed. Parameters with a standard deviation
+    of zero, for example in a table reduced by screening, are fixed at their means.
+    """
+    import chaospy as cp
 
     # We need to set up the covariance matrix and the estimated parameters from the paper.
-    df = pd.read_csv(f"{INPUT_DIR}/table41_kw_94.csv", sep=",")
+    df = get_spec_table(spec, table)
     mean, cov = df["true"].values, np.diag((df["sd"] ** 2).values)
+    is_free = df["sd"].values != 0
+
+    np.random.seed(seed)
+    distribution = cp.MvNormal(loc=mean[is_free], scale=cov[is_free][:, is_free])
+
+    samples = np.tile(mean, (num_draws, 1))
+    samples[:, is_free] = get_samples(distribution, num_draws, sampler)
+
+    return samples, df["parameter"].values
+
+
+def run(args):
+
+    # The timing trace is stored next to the results and covers the main process as well.
+    trace = None
+    if args.timing:
+        trace = "timings.uq.jsonl"
+        if not args.resume and os.path.exists(trace):
+            os.remove(trace)
+        start_trace(trace)
+
+    # We need to take stock for baseline parameters and store them for future processing.
+    base_params, base_quantity = dict(), list()
+    for spec in args.specs:
+        base_params[spec], base_options = get_example_model(spec)
+        if args.num_agents is not None:
+            base_options["simulation_agents"] = args.num_agents
+
+        simulate = get_simulate_func(base_params[spec], base_options)
+        base_quantity.append(
+            ((spec, 0), get_policy_effects(base_params[spec], simulate, args.subsidies,
+                                           args.quantities))
+        )
+
+    # The stopping rule is based on the first statistic unless requested otherwise.
+    labels = base_quantity[0][1].index.get_level_values("quantity")
+    target = labels[0] if args.target_quantity is None else args.target_quantity
+    assert target in labels, "unknown target quantity"
+
+    base_quantity = drop_single_subsidy(get_quantity_chunk(base_quantity))
+    base_quantity = base_quantity.droplevel("iteration")
+    if len(args.specs) == 1:
+        base_quantity.index = [0]
+        base_params[args.specs[0]].to_pickle(os.path.join(args.rslt_dir, "base_params.uq.pkl"))
+    else:
+        fname = os.path.join(args.rslt_dir, "base_params.uq.pkl")
+        pd.concat(base_params, names=["spec"]).to_pickle(fname)
+    base_quantity.to_pickle(os.path.join(args.rslt_dir, "base_quantity.uq.pkl"))
+
+    # We are ready to draw the random points of evaluation for each specification.
+    samples, index = dict(), dict()
+    for spec in args.specs:
+        samples[spec], index[spec] = get_spec_setup(
+            spec, args.seed, args.num_draws, args.sampler, args.table
+        )
+
+    # We stream the results to disk as the workers finish, so that a run can be resumed after a
+    # crash. Only the iterations that are not yet stored are scheduled.
+    metadata = {
+        "seed": args.seed,
+        "num_draws": args.num_draws,
+        "sampler": args.sampler,
+        "num_agents": args.num_agents,
+        "subsidies": args.subsidies,
+        "quantities": args.quantities,
+        "specs": args.specs,
+        "table": args.table,
+        "min_draws": args.min_draws,
+    }
+    if args.resume:
+        resume_chunks(args.chunk_dir, metadata)
+    else:
+        reset_chunks(args.chunk_dir, metadata)
+
+    # We keep track of the precision of the mean effects for each specification as the results
+    # arrive. This allows to stop early once a target precision is reached, with --draws as the
+    # upper limit.
+    moments = {spec: get_streaming_moments(len(args.subsidies)) for spec in args.specs}
+    target_se = get_target_standard_error(args.target_se, args.target_width)
+
+    stored, completed = load_chunks(args.chunk_dir), set()
+    if stored is not None:
+        for (spec, _), quantity in stored.iterrows():
+            update_streaming_moments(moments[spec], get_target_values(quantity, target))
+        completed = set(stored.index)
+
+    # We interleave the draws of all specifications, so that the workers stay busy until the
+    # very end instead of idling at the tail of each specification.
+    tasks = [
+        ((spec, i), samples[spec][i])
+        for i in range(args.num_draws)
+        for spec in args.specs
+        if (spec, i) not in completed
+    ]
+
+    # Without a target precision, all draws are submitted as a single batch.
+    batch_size = args.batch_size if target_se is not None else max(1, len(tasks))
+
+    # Each worker builds the simulate functions only once at startup and then just updates the
+    # parameters for each draw.
+    evaluate = get_quantity_of_interest_iteration
+    initargs = (args.num_agents, args.subsidies, args.cache, trace, args.quantities, args.specs)
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        while tasks:
+            # Specifications that reached the target precision receive no further draws. The
+            # effects are discrete and share common random numbers, so a few draws often show
+            # no variation at all, and we only trust the precision after a minimum of draws.
+            if target_se is not None:
+                done = [
+                    spec for spec in args.specs
+                    if moments[spec]["count"] >= args.min_draws
+                    and np.all(get_standard_error(moments[spec]) <= target_se)
+                ]
+                tasks = [task for task in tasks if task[0][0] not in done]
 
-    # We are ready to draw the random points of evaluation.
-    np.random.seed(args.seed)
-    distribution = cp.MvNormal(loc=mean, scale=cov)
+            batch, tasks, rslt = tasks[:batch_size], tasks[batch_size:], list()
+            for key, quantity in imap_unordered(evaluate, batch, args.task_chunk_size):
+                update_streaming_moments(moments[key[0]], get_target_values(quantity, target))
+                rslt.append((key, quantity))
 
-    samples = list()
-    for _ in range(args.num_draws):
-        samples.append(distribution.sample())
+                if len(rslt) == args.chunk_size:
+                    write_chunk(args.chunk_dir, get_quantity_chunk(rslt))
+                    rslt = list()
 
-    quantities = mp.Pool(args.num_procs).map(get_quantity_of_interest, samples)
+            if rslt:
+                write_chunk(args.chunk_dir, get_quantity_chunk(rslt))
+
+    if target_se is not None:
+        for spec in args.specs:
+            print(f"{spec}: draws {moments[spec]['count']}, "
+                  f"standard error {get_standard_error(moments[spec]).max():.4f}")
 
     # We now store the random parameters and the quantity of interest for further processing.
-    index = pd.read_csv(f"{INPUT_DIR}/table41_kw_94.csv", sep=",")["parameter"].values
+    # After an early stop, we only keep the draws that were actually evaluated. With several
+    # specifications, the draws of each one are stored in a directory of its own and the
+    # quantities are also collected in a single table keyed by specification.
+    mc_quantities = drop_single_subsidy(load_chunks(args.chunk_dir))
 
-    params = list()
-    for sample in samples:
-        sample = pd.Series(data=sample, index=index)
+    for spec in args.specs:
+        dirname = "." if len(args.specs) == 1 else spec
+        os.makedirs(dirname, exist_ok=True)
 
-        param_sample = pd.DataFrame(transform_params_kw94_respy(sample), columns=["value"])
-        params.append(param_sample)
-    mc_params = pd.concat(params, keys=range(args.num_draws), names=['iteration'])
+        spec_quantities = mc_quantities.loc[spec]
+        spec_samples = samples[spec][spec_quantities.index.values]
 
-    mc_quantities = pd.DataFrame(quantities, columns=['avg_schooling'], index=range(args.num_draws))
-    mc_quantities.index.name = 'iteration'
+        params = transform_params_kw94_respy_batch(spec_samples, index[spec], base_params[spec])
 
-    mc_quantities.to_pickle("mc_quantity.uq.pkl")
-    mc_params.to_pickle("mc_params.uq.pkl")
+        # The parameters are stored as a wide matrix that can be opened memory-mapped. We also
+        # keep the draws on the KW94 scale, which is the input space of the surrogate.
+        save_mc_params(dirname, params, base_params[spec].index)
+        np.save(os.path.join(dirname, "mc_samples.uq.npy"), spec_samples)
+        spec_quantities.to_pickle(os.path.join(dirname, "mc_quantity.uq.pkl"))
 
+    if len(args.specs) > 1:
+        mc_quantities.to_pickle("mc_quantity.uq.pkl")
 
-if __name__ == '__main__':
 
+def get_parser():
+    """Set up the command line interface, which is also used to run the script from Python."""
     parser = argparse.ArgumentParser(description="Create results for UQ analysis.")
 
     parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
@@ -85,6 +247,74 @@ if __name__ == '__main__':
     parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
                         help="set number of processes")
 
+    parser.add_argument("--specs", action="store", dest="specs", default=["kw_94_one"],
+                        choices=list(SPECS), nargs="+",
+                        help="set KW94 specifications evaluated in a single pool")
+
+    parser.add_argument("--table", action="store", dest="table", default=None,
+                        help="set input table of a single specification, e.g. a reduced one")
+
+    parser.add_argument("--sampler", action="store", dest="sampler", default="random",
+                        choices=SAMPLERS, help="set sampling scheme for the draws")
+
+    parser.add_argument("--resume", action="store_true", dest="resume",
+                        help="resume an interrupted run from its stored chunks")
+
+    parser.add_argument("--chunk-size", action="store", dest="chunk_size", default=10, type=int,
+                        help="set number of results per stored chunk")
+
+    parser.add_argument("--rslt-dir", action="store", dest="rslt_dir", default=str(RSLT_DIR),
+                        help="set directory of the baseline results")
+
+    parser.add_argument("--chunk-dir", action="store", dest="chunk_dir", default="mc_chunks",
+                        help="set directory of the stored chunks")
+
+    parser.add_argument("-a", "--agents", action="store", dest="num_agents", default=None,
+                        type=int, help="set number of simulated agents")
+
+    parser.add_argument("--subsidies", action="store", dest="subsidies", default=[500.0],
+                        type=float, nargs="+", help="set tuition subsidies to evaluate")
+
+    parser.add_argument("--quantities", action="store", dest="quantities",
+                        default=["avg_schooling"], choices=sorted(QUANTITIES), nargs="+",
+                        help="set quantities of interest computed from each simulation")
+
+    parser.add_argument("--target-quantity", action="store", dest="target_quantity",
+                        default=None, help="set statistic whose precision determines the stop")
+
+    parser.add_argument("--target-se", action="store", dest="target_se", default=None,
+                        type=float, help="stop once the mean effect has this standard error")
+
+    parser.add_argument("--target-width", action="store", dest="target_width", default=None,
+                        type=float, help="stop once the 95%% interval of the mean is this wide")
+
+    parser.add_argument("--min-draws", action="store", dest="min_draws", default=30, type=int,
+                        help="set number of draws before the target precision is checked")
+
+    parser.add_argument("--batch-size", action="store", dest="batch_size", default=20, type=int,
+                        help="set number of draws submitted at once when targeting a precision")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--task-chunk-size", action="store", dest="task_chunk_size", default=1,
+                        type=int, help="set number of draws handed to a worker at once")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    parser.add_argument("--timing", action="store_true", dest="timing",
+                        help="record the time spent in each stage of the evaluations")
+
+    return parser
+
+
+if __name__ == '__main__':
+
+    parser = get_parser()
     args = parser.parse_args()
 
+    if args.table is not None and len(args.specs) > 1:
+        parser.error("--table requires a single specification")
+
     run(args)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""This script reweights the results of our Monte Carlo explorations to a new input table."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+from functools import partial
+import argparse
+import pickle as pkl
+import warnings
+
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import get_quantities_of_interest
+from uq_auxiliary import drop_single_subsidy
+from uq_auxiliary import get_spec_table
+from uq_auxiliary import init_worker
+from uq_reweighting import get_mixture_log_density
+from uq_reweighting import get_effective_sample_size
+from uq_reweighting import get_importance_weights
+from uq_reweighting import get_weighted_quantiles
+from uq_reweighting import get_num_fallback_draws
+from uq_reweighting import get_weighted_moments
+from uq_reweighting import get_log_density
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+from uq_registry import get_input_table
+from uq_sampling import get_samples
+from uq_sampling import SAMPLERS
+from uq_storage import load_metadata
+
+TABLES = ["table41_kw_94", "table42_kw_94", "table43_kw_94"]
+
+
+def get_fallback_quantities(samples, metadata, spec, args):
+    """Evaluate new draws with the same setup as the stored run.
+
+    The specification, fidelity, subsidies, and quantities need to agree, as otherwise the old
+    and new draws would not be samples of the same quantity.
+    """
+    subsidies = metadata.get("subsidies", [500.0])
+    quantities = metadata.get("quantities", ["avg_schooling"])
+
+    evaluate = partial(get_quantities_of_interest, spec=spec)
+
+    initargs = (metadata.get("num_agents"), subsidies, args.cache, None, quantities, [spec])
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        rslt = map_ordered(imap_unordered, evaluate, samples)
+
+    df = pd.concat(rslt, axis=1).T
+    df.columns.names = ["quantity", "tuition_subsidy"]
+
+    return drop_single_subsidy(df)
+
+
+def get_fallback_seed(seed):
+    """Derive the seed of the new draws from the seed of the stored run.
+
+    Reusing the seed of the stored run would reproduce the standard normal values behind its
+    draws, so that the new draws are just shifted copies of the old ones. We thus spawn an
+    independent stream.
+    """
+    return int(np.random.SeedSequence(seed).spawn(1)[0].generate_state(1)[0])
+
+
+def get_summary(quantity, weights, quantiles):
+    """Collect the weighted moments and quantiles of each column of the results."""
+    mean, sd = get_weighted_moments(quantity.values, weights)
+
+    rslt = pd.DataFrame({"mean": mean, "sd": sd}, index=quantity.columns)
+    for q, values in zip(quantiles, get_weighted_quantiles(quantity.values, weights, quantiles)):
+        rslt[f"q{q:g}"] = values
+
+    return rslt
+
+
+def run(args):
+
+    metadata = load_metadata(args.chunk_dir)
+
+    # The new draws need to be independent of the stored ones. The deterministic designs would
+    # simply repeat the stored points if the run used the same rule.
+    seed = get_fallback_seed(metadata["seed"]) if args.seed is None else args.seed
+    assert seed != metadata["seed"], "The new draws need a seed different from the stored run."
+    is_repeated = args.sampler in ["sobol", "halton"] and args.sampler == metadata["sampler"]
+    assert not is_repeated, "The new draws need a sampling scheme different from the stored run."
+
+    # The stored draws come from the input table of the stored run's specification, unless the
+    # run used a table of its own.
+    specs = metadata.get("specs", ["kw_94_one"])
+    assert len(specs) == 1, "Reweighting requires a run with a single specification."
+    spec = specs[0]
+
+    source = get_spec_table(spec, metadata.get("table"))
+    target = get_input_table(args.target)
+    assert np.all(source["sd"].values != 0), "Cannot reweight runs with fixed parameters."
+
+    components = [
+        (source["true"].values, source["sd"].values),
+        (target["true"].values, target["sd"].values),
+    ]
+
+    # We reweight the draws on the KW94 scale, where the input distributions are defined.
+    samples = np.load("mc_samples.uq.npy")
+    quantity = pd.read_pickle("mc_quantity.uq.pkl")
+
+    log_target = get_log_density(samples, *components[1])
+    weights = get_importance_weights(log_target, get_log_density(samples, *components[0]))
+    ess = get_effective_sample_size(weights)
+    print(f"Effective sample size {ess:.1f} of {len(weights)} draws")
+
+    # If the target is too far from the original distribution, we add new draws from the target
+    # and treat all draws as coming from the mixture of both distributions.
+    def sample_target(num_draws):
+        import chaospy as cp
+
+        np.random.seed(seed)
+        distribution = cp.MvNormal(loc=components[1][0], scale=np.diag(components[1][1] ** 2))
+        return get_samples(distribution, num_draws, args.sampler)
+
+    new_samples, ess = get_num_fallback_draws(samples, components, args.min_ess, sample_target,
+                                              args.max_draws)
+    num_new = len(new_samples)
+    if num_new > 0:
+        new_quantity = get_fallback_quantities(new_samples, metadata, spec, args)
+        new_quantity.index = new_quantity.index + len(samples)
+
+        samples = np.concatenate([samples, new_samples])
+        quantity = pd.concat([quantity, new_quantity.astype(float)])
+
+        log_target = get_log_density(samples, *components[1])
+        log_proposal = get_mixture_log_density(samples, components, [len(weights), num_new])
+        weights = get_importance_weights(log_target, log_proposal)
+        ess = get_effective_sample_size(weights)
+        print(f"Effective sample size {ess:.1f} after {num_new} new draws")
+
+    if ess < args.min_ess:
+        warnings.warn(f"Effective sample size {ess:.1f} remains below {args.min_ess:g}, "
+                      f"consider increasing --max-draws.")
+
+    rslt = get_summary(quantity, weights, args.quantiles)
+
+    # We store the summary together with the setup of the reweighting in a plain dictionary.
+    with open("reweighting.uq.pkl", "wb") as outfile:
+        pkl.dump({"summary": rslt, "target": args.target, "ess": ess, "num_new": num_new},
+                 outfile)
+
+    print(rslt.to_string(float_format="{:8.4f}".format))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Reweight results of UQ analysis.")
+
+    parser.add_argument("-t", "--target", action="store", dest="target", required=True,
+                        choices=TABLES, help="set input table of the target distribution")
+
+    parser.add_argument("--min-ess", action="store", dest="min_ess", default=100.0, type=float,
+                        help="set effective sample size below which new draws are added")
+
+    parser.add_argument("-q", "--quantiles", action="store", dest="quantiles",
+                        default=[0.05, 0.5, 0.95], type=float, nargs="+",
+                        help="set quantiles to report")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=None, type=int,
+                        help="set seed for the new draws, derived from the stored run by default")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("--max-draws", action="store", dest="max_draws", default=10000,
+                        type=int, help="set maximum number of new draws")
+
+    parser.add_argument("--sampler", action="store", dest="sampler", default="random",
+                        choices=SAMPLERS, help="set sampling scheme for the new draws")
+
+    parser.add_argument("--chunk-dir", action="store", dest="chunk_dir", default="mc_chunks",
+                        help="set directory of the stored chunks")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    run(args)
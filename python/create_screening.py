@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""This script creates the elementary-effects screening of the input parameters."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+import argparse
+
+import numpy as np
+
+from uq_auxiliary import get_quantity_of_interest
+from uq_auxiliary import init_worker
+from uq_screening import get_standardized_points
+from uq_screening import get_morris_trajectories
+from uq_screening import get_elementary_effects
+from uq_screening import get_morris_indices
+from uq_screening import get_reduced_table
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+from uq_registry import get_input_table
+
+
+def run(args):
+
+    df = get_input_table(args.table)
+    mean, sd = df["true"].values, df["sd"].values
+
+    # The design consists of (26 + 1) * r points, which we evaluate all at once.
+    np.random.seed(args.seed)
+    trajectories = get_morris_trajectories(len(mean), args.num_trajectories, args.num_levels)
+    points = get_standardized_points(trajectories, args.num_levels).reshape(-1, len(mean))
+
+    initargs = (args.num_agents, [500.0], args.cache)
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        evals = np.array(
+            map_ordered(imap_unordered, get_quantity_of_interest, mean + points * sd,
+                        args.task_chunk_size)
+        )
+
+    effects = get_elementary_effects(evals, trajectories)
+    rslt = get_morris_indices(effects, df["parameter"].values)
+
+    # We fix the unimportant parameters at their means in a copy of the input table, which
+    # can be passed to the other scripts with --table.
+    reduced = get_reduced_table(df, rslt, args.threshold)
+    reduced.to_csv(args.reduced, index=False)
+
+    rslt["fixed"] = (reduced["sd"] == 0).values
+    rslt.to_pickle("screening.uq.pkl")
+
+    rslt = rslt.sort_values("mu_star", ascending=False)
+    print(rslt.to_string(float_format="{:8.4f}".format))
+    print(f"Fixed {rslt['fixed'].sum()} of {len(rslt)} parameters in {args.reduced}")
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create screening for UQ analysis.")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
+                        help="set seed for the analysis")
+
+    parser.add_argument("-r", "--trajectories", action="store", dest="num_trajectories",
+                        default=20, type=int, help="set number of trajectories")
+
+    parser.add_argument("-l", "--levels", action="store", dest="num_levels", default=4,
+                        type=int, help="set number of levels of the grid, which needs to be even")
+
+    parser.add_argument("--threshold", action="store", dest="threshold", default=0.1,
+                        type=float, help="set absolute mean effect relative to the largest one "
+                                         "below which a parameter is fixed")
+
+    parser.add_argument("-t", "--table", action="store", dest="table", default="table41_kw_94",
+                        help="set input table")
+
+    parser.add_argument("--reduced", action="store", dest="reduced",
+                        default="table41_kw_94_reduced.csv", help="set file of the reduced table")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("-a", "--agents", action="store", dest="num_agents", default=None,
+                        type=int, help="set number of simulated agents")
+
+    parser.add_argument("--task-chunk-size", action="store", dest="task_chunk_size", default=1,
+                        type=int, help="set number of points handed to a worker at once")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    if args.num_levels % 2 != 0:
+        parser.error("--levels needs to be even")
+
+    run(args)
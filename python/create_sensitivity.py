@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""This script creates the results for our variance-based sensitivity analysis."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+import argparse
+
+import numpy as np
+
+from uq_auxiliary import get_quantity_of_interest
+from uq_auxiliary import init_worker
+from uq_sensitivity import get_saltelli_design
+from uq_sensitivity import get_unique_design
+from uq_sensitivity import get_sobol_indices
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+from uq_sampling import SAMPLERS
+from uq_registry import get_input_table
+
+
+def run(args):
+
+    df = get_input_table(args.table)
+    mean, sd = df["true"].values, df["sd"].values
+
+    # The design contains (26 + 2) * N points, but we only need to evaluate the unique ones.
+    np.random.seed(args.seed)
+    design = get_saltelli_design(mean, sd, args.num_draws, args.sampler)
+    unique, inverse = get_unique_design(design)
+
+    # Each model evaluation takes seconds, so we hand out several points at once only if there
+    # are many more points than workers.
+    chunk_size = args.task_chunk_size
+    if chunk_size is None:
+        chunk_size = max(1, len(unique) // (args.num_procs * 20))
+
+    initargs = (args.num_agents, [500.0], args.cache)
+    with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+        evals = np.array(map_ordered(imap_unordered, get_quantity_of_interest, unique, chunk_size))
+
+    rslt = get_sobol_indices(evals[inverse], df["parameter"].values, args.num_bootstrap)
+
+    rslt.to_pickle("sensitivity.uq.pkl")
+    print(rslt.to_string(float_format="{:8.4f}".format))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create sensitivity analysis for UQ analysis.")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", default=123, type=int,
+                        help="set seed for the analysis")
+
+    parser.add_argument("-d", "--draws", action="store", dest="num_draws", default=64, type=int,
+                        help="set number of draws for each of the base matrices")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("-a", "--agents", action="store", dest="num_agents", default=None,
+                        type=int, help="set number of simulated agents")
+
+    parser.add_argument("-b", "--bootstrap", action="store", dest="num_bootstrap", default=1000,
+                        type=int, help="set number of bootstrap replicates")
+
+    parser.add_argument("-t", "--table", action="store", dest="table", default="table41_kw_94",
+                        help="set input table, e.g. one reduced by screening")
+
+    parser.add_argument("--sampler", action="store", dest="sampler", default="sobol",
+                        choices=SAMPLERS, help="set sampling scheme for the base matrices")
+
+    parser.add_argument("--task-chunk-size", action="store", dest="task_chunk_size", default=None,
+                        type=int, help="set number of points handed to a worker at once")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""This script fits a polynomial chaos surrogate of the quantity of interest."""
+import os
+
+# In this script we only have explicit use of MULTIPROCESSING as our level of parallelism. This
+# needs to be done right at the beginning of the script.
+update = {
+    "NUMBA_NUM_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "NUMEXPR_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+os.environ.update(update)
+
+from functools import partial
+import argparse
+import pickle as pkl
+
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import get_quantities_of_interest
+from uq_auxiliary import get_spec_table
+from uq_auxiliary import init_worker
+from uq_auxiliary import SPECS
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+from uq_surrogate import get_delta_contributions
+from uq_surrogate import get_difference_design
+from uq_surrogate import fit_surrogate_spectral
+from uq_surrogate import fit_surrogate_delta
+from uq_surrogate import get_surrogate_quantiles
+from uq_surrogate import get_quadrature_design
+from uq_surrogate import save_surrogate
+from uq_surrogate import fit_surrogate
+
+
+def run(args):
+
+    df = get_spec_table(args.spec, args.table)
+    mean, sd = df["true"].values, df["sd"].values
+
+    # The delta method can account for correlated parameters with a full covariance matrix.
+    cov = np.diag(sd ** 2)
+    if args.covariance is not None:
+        cov = np.loadtxt(args.covariance, delimiter=",")
+
+    if args.method == "collocation":
+        # We fit the expansion to the draws of an earlier Monte Carlo run.
+        samples = np.load("mc_samples.uq.npy")
+        evals = pd.read_pickle("mc_quantity.uq.pkl").iloc[:, args.column].values
+
+        surrogate = fit_surrogate(samples, evals, mean, sd, args.order)
+
+    else:
+        # We evaluate the quantity of interest on the sparse grid or the central differences
+        # around the mean of the parameters in parallel.
+        if args.method == "spectral":
+            samples, weights = get_quadrature_design(mean, sd, args.order)
+        else:
+            samples = get_difference_design(mean, sd, args.step)
+
+        evaluate = partial(get_quantities_of_interest, tuition_subsidies=[500.0],
+                           quantities=["avg_schooling"], spec=args.spec)
+
+        initargs = (args.num_agents, [500.0], args.cache, None, ["avg_schooling"], [args.spec])
+        with get_executor(args.backend, args.num_procs, init_worker, initargs) as imap_unordered:
+            rslt = map_ordered(imap_unordered, evaluate, samples)
+        evals = np.array([quantity[("avg_schooling", 500.0)] for quantity in rslt])
+
+        if args.method == "spectral":
+            surrogate = fit_surrogate_spectral(samples, weights, evals, mean, sd, args.order)
+        else:
+            surrogate = fit_surrogate_delta(evals, mean, sd, args.step, cov)
+
+    save_surrogate(surrogate, "surrogate.uq.pkl")
+
+    quantiles = get_surrogate_quantiles(surrogate, [0.05, 0.5, 0.95])
+
+    print(f"Mean     {surrogate['expectation']:10.4f}")
+    print(f"Variance {surrogate['variance']:10.4f}")
+    print(f"Q05      {quantiles[0]:10.4f}")
+    print(f"Q50      {quantiles[1]:10.4f}")
+    print(f"Q95      {quantiles[2]:10.4f}")
+
+    # The delta method also reports the linear sensitivity of the quantity to each parameter.
+    if args.method == "delta":
+        variance, shares = get_delta_contributions(surrogate["gradient"], cov)
+
+        rslt = pd.DataFrame(index=pd.Index(df["parameter"].values, name="parameter"))
+        rslt["gradient"] = surrogate["gradient"]
+        rslt["scaled"] = surrogate["gradient"] * np.sqrt(np.diag(cov))
+        rslt["share"] = shares
+
+        # We store the contributions together with the moments in a plain dictionary.
+        with open("delta.uq.pkl", "wb") as outfile:
+            pkl.dump({"contributions": rslt, "expectation": surrogate["expectation"],
+                      "variance": variance}, outfile)
+
+        print(rslt.to_string(float_format="{:10.4f}".format))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Create surrogate for UQ analysis.")
+
+    parser.add_argument("-m", "--method", action="store", dest="method", default="collocation",
+                        choices=["collocation", "spectral", "delta"], help="set fitting method")
+
+    parser.add_argument("-o", "--order", action="store", dest="order", default=2, type=int,
+                        help="set order of the expansion")
+
+    parser.add_argument("-c", "--column", action="store", dest="column", default=0, type=int,
+                        help="set column of the stored quantities for collocation")
+
+    parser.add_argument("--step", action="store", dest="step", default=0.5, type=float,
+                        help="set step of the central differences in standard deviations")
+
+    parser.add_argument("--spec", action="store", dest="spec", default="kw_94_one",
+                        choices=list(SPECS), help="set KW94 specification")
+
+    parser.add_argument("-t", "--table", action="store", dest="table", default=None,
+                        help="set input table of the specification, e.g. a reduced one")
+
+    parser.add_argument("--covariance", action="store", dest="covariance", default=None,
+                        help="set CSV file of a full covariance matrix for the delta method")
+
+    parser.add_argument("-p", "--procs", action="store", dest="num_procs", default=2, type=int,
+                        help="set number of processes")
+
+    parser.add_argument("-a", "--agents", action="store", dest="num_agents", default=None,
+                        type=int, help="set number of simulated agents")
+
+    parser.add_argument("--backend", action="store", dest="backend", default="multiprocessing",
+                        choices=BACKENDS, help="set backend for the parallel evaluations")
+
+    parser.add_argument("--cache", action="store", dest="cache", default=None,
+                        help="set file of the evaluation cache")
+
+    args = parser.parse_args()
+
+    run(args)
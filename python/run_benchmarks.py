@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""This script runs the benchmarks of our UQ pipeline and keeps a history of the results.
+
+Each benchmark reports the best time over several repetitions. The end-to-end runs also report
+the throughput in draws per second and the parallel efficiency relative to a single process.
+All results are appended to a JSONL history, and a run fails if any benchmark is slower than
+the best earlier result on the same machine by more than the tolerance.
+"""
+from pathlib import Path
+import subprocess as sp
+import contextlib
+import tempfile
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+import pandas as pd
+import numpy as np
+
+from create_results import get_parser
+from create_results import run as run_create_results
+from uq_auxiliary import transform_params_kw94_respy_batch
+from uq_auxiliary import transform_params_kw94_respy
+from uq_auxiliary import get_quantity_of_interest
+from uq_auxiliary import init_worker
+from uq_registry import get_input_table
+from uq_registry import clear_registry
+from uq_configurations import PROJECT_DIR
+from uq_configurations import RSLT_DIR
+
+SUITES = ["transform", "quantity", "create_results"]
+
+
+def get_best_time(func, num_repeat):
+    """Measure the best wall time of several calls."""
+    times = list()
+    for _ in range(num_repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+@contextlib.contextmanager
+def in_temporary_directory():
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+
+
+def benchmark_transform(args):
+
+    df = get_input_table("table41_kw_94")
+    sample = pd.Series(data=df["true"].values, index=df["parameter"].values)
+    samples = np.tile(df["true"].values, (args.num_batch, 1))
+
+    rslt = list()
+
+    seconds = get_best_time(lambda: transform_params_kw94_respy(sample), args.num_repeat)
+    rslt.append({"benchmark": "transform_single", "params": {}, "seconds": seconds})
+
+    seconds = get_best_time(
+        lambda: transform_params_kw94_respy_batch(samples, df["parameter"].values),
+        args.num_repeat,
+    )
+    rslt.append(
+        {
+            "benchmark": "transform_batch",
+            "params": {"draws": args.num_batch},
+            "seconds": seconds,
+            "throughput": args.num_batch / seconds,
+        }
+    )
+
+    return rslt
+
+
+def benchmark_quantity(args):
+
+    df = get_input_table("table41_kw_94")
+
+    rslt = list()
+
+    # The setup includes loading the example model, which earlier suites already registered.
+    clear_registry()
+    seconds = get_best_time(init_worker, 1)
+    rslt.append({"benchmark": "init_worker", "params": {}, "seconds": seconds})
+
+    seconds = get_best_time(lambda: get_quantity_of_interest(df["true"].values), args.num_repeat)
+    rslt.append(
+        {"benchmark": "quantity_of_interest", "params": {}, "seconds": seconds,
+         "throughput": 1 / seconds}
+    )
+
+    return rslt
+
+
+def benchmark_create_results(args):
+
+    rslt = list()
+    for num_draws in args.draws:
+        for num_procs in args.procs:
+            options = ["--draws", str(num_draws), "--procs", str(num_procs)]
+
+            # All outputs go to the temporary directory, so that the results of the last real
+            # run remain untouched.
+            with in_temporary_directory():
+                run_args = get_parser().parse_args(options + ["--rslt-dir", os.getcwd()])
+                seconds = get_best_time(lambda: run_create_results(run_args), args.num_repeat)
+
+            rslt.append(
+                {
+                    "benchmark": "create_results",
+                    "params": {"draws": num_draws, "procs": num_procs},
+                    "seconds": seconds,
+                    "throughput": num_draws / seconds,
+                }
+            )
+
+        # The parallel efficiency compares the throughput to a perfect scaling of the single
+        # process run.
+        serial = [r for r in rslt if r["params"] == {"draws": num_draws, "procs": 1}]
+        if serial:
+            for record in rslt:
+                if record["params"]["draws"] == num_draws:
+                    num_procs = record["params"]["procs"]
+                    efficiency = record["throughput"] / (num_procs * serial[0]["throughput"])
+                    record["efficiency"] = efficiency
+
+    return rslt
+
+
+def get_commit():
+
+    try:
+        cmd = ["git", "rev-parse", "--short", "HEAD"]
+        return sp.check_output(cmd, cwd=PROJECT_DIR, stderr=sp.DEVNULL).decode().strip()
+    except (sp.CalledProcessError, OSError):
+        return None
+
+
+def check_regressions(rslt, history, tolerance):
+    """Compare the new results to the best earlier ones on the same machine."""
+    regressions = list()
+    for record in rslt:
+        earlier = [
+            r["seconds"]
+            for r in history
+            if (r["benchmark"], r["params"], r["host"])
+            == (record["benchmark"], record["params"], record["host"])
+        ]
+        if earlier and record["seconds"] > (1 + tolerance) * min(earlier):
+            regressions.append((record, min(earlier)))
+
+    return regressions
+
+
+def run(args):
+
+    suites = {
+        "transform": benchmark_transform,
+        "quantity": benchmark_quantity,
+        "create_results": benchmark_create_results,
+    }
+
+    info = {"commit": get_commit(), "host": platform.node(), "timestamp": time.time()}
+
+    rslt = list()
+    for name in args.suites or suites.keys():
+        for record in suites[name](args):
+            record.update(info)
+            rslt.append(record)
+
+    history = list()
+    if Path(args.history).exists():
+        with open(args.history, "r") as infile:
+            history = [json.loads(line) for line in infile]
+
+    with open(args.history, "a") as outfile:
+        for record in rslt:
+            outfile.write(json.dumps(record) + "\n")
+
+    df = pd.DataFrame(rslt)
+    df["params"] = df["params"].apply(lambda x: ", ".join(f"{k}={v}" for k, v in x.items()))
+    columns = [c for c in ["benchmark", "params", "seconds", "throughput", "efficiency"] if c in df]
+    print(df[columns].to_string(index=False, float_format="{:12.4f}".format))
+
+    regressions = check_regressions(rslt, history, args.tolerance)
+    for record, best in regressions:
+        print(
+            f"Regression in {record['benchmark']} {record['params']}: "
+            f"{record['seconds']:.4f}s compared to {best:.4f}s"
+        )
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Run benchmarks for UQ analysis.")
+
+    parser.add_argument("suites", action="store", nargs="*", default=None,
+                        help=f"set benchmark suites to run out of {SUITES}, all by default")
+
+    parser.add_argument("-r", "--repeat", action="store", dest="num_repeat", default=3, type=int,
+                        help="set number of repetitions for each benchmark")
+
+    parser.add_argument("-d", "--draws", action="store", dest="draws", default=[4, 16],
+                        type=int, nargs="+", help="set numbers of draws for end-to-end runs")
+
+    parser.add_argument("-p", "--procs", action="store", dest="procs", default=[1, 2, 4],
+                        type=int, nargs="+", help="set numbers of processes for end-to-end runs")
+
+    parser.add_argument("--batch", action="store", dest="num_batch", default=100000, type=int,
+                        help="set number of draws for the batch transformation")
+
+    parser.add_argument("--history", action="store", dest="history",
+                        default=str(RSLT_DIR / "benchmarks.uq.jsonl"),
+                        help="set file of the benchmark history")
+
+    parser.add_argument("--tolerance", action="store", dest="tolerance", default=0.2,
+                        type=float, help="set allowed slowdown relative to the best earlier run")
+
+    args = parser.parse_args()
+
+    if not set(args.suites or []).issubset(SUITES):
+        parser.error(f"benchmark suites need to be out of {SUITES}")
+
+    run(args)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""This script summarizes the timing trace of our model evaluations."""
+import argparse
+
+from uq_timing import get_timing_summary
+
+
+def run(args):
+
+    by_stage, by_worker = get_timing_summary(args.fname)
+
+    print("Time by stage\n")
+    print(by_stage.to_string(float_format="{:10.4f}".format))
+
+    print("\nWall time by worker and stage\n")
+    print(by_worker.to_string(float_format="{:10.4f}".format))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Summarize timing trace for UQ analysis.")
+
+    parser.add_argument("fname", action="store", nargs="?", default="timings.uq.jsonl",
+                        help="set file of the timing trace")
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,69 @@
+import pandas as pd
+import numpy as np
+
+from uq_auxiliary import get_average_schooling
+from uq_auxiliary import get_policy_effects
+from uq_auxiliary import QUANTITIES
+from uq_auxiliary import CHOICES
+
+
+def test_average_schooling():
+    """ Test whether the array-based reduction agrees with grouping the simulated panel.
+    """
+    np.random.seed(123)
+    identifier = np.repeat(np.arange(100), 40)
+    edu = np.random.randint(0, 5, size=(100, 40)).cumsum(axis=1).ravel()
+
+    df = pd.DataFrame({"Identifier": identifier, "Experience_Edu": edu})
+    expected = df.groupby("Identifier")["Experience_Edu"].max().mean()
+
+    np.testing.assert_almost_equal(get_average_schooling(df), expected)
+    np.testing.assert_almost_equal(get_average_schooling(df.sample(frac=1)), expected)
+    np.testing.assert_almost_equal(
+        get_average_schooling(df.set_index(["Identifier"], append=True)), expected
+    )
+
+
+def test_quantities_single_simulation():
+    """ Test whether all quantities are computed from a single simulated panel per scenario.
+    """
+    np.random.seed(123)
+    num_agents, num_periods = 50, 4
+    choice = np.random.choice(CHOICES, size=num_agents * num_periods)
+
+    params = pd.DataFrame(
+        {"value": [0.95, -5000.0]},
+        index=pd.MultiIndex.from_tuples(
+            [("delta", "delta"), ("nonpec_edu", "at_least_twelve_exp_edu")]
+        ),
+    )
+
+    calls = list()
+
+    def simulate(params):
+        calls.append(params)
+        shift = params.loc[("nonpec_edu", "at_least_twelve_exp_edu"), "value"] + 5000.0
+        df = pd.DataFrame({
+            "Identifier": np.repeat(np.arange(num_agents), num_periods),
+            "Period": np.tile(np.arange(num_periods), num_agents),
+            "Experience_Edu": np.full(num_agents * num_periods, 10.0 + shift / 1000.0),
+            "Choice": choice,
+            "Wage": np.where(np.isin(choice, ["a", "b"]), np.exp(10.0), np.nan),
+        })
+        for label in CHOICES:
+            df[f"Flow_Utility_{label}"] = 1.0
+        return df
+
+    rslt = get_policy_effects(params, simulate, [0.0, 500.0], sorted(QUANTITIES))
+    assert len(calls) == 2
+
+    np.testing.assert_almost_equal(rslt[("avg_schooling", 500.0)], 0.5)
+    np.testing.assert_almost_equal(rslt[("mean_log_wage", 500.0)], 0.0)
+    np.testing.assert_almost_equal(rslt.xs(0.0, level="tuition_subsidy").abs().sum(), 0.0)
+    assert ("share_home_3", 500.0) in rslt.index
+
+    shares = QUANTITIES["occupation_shares"](simulate(params), params)
+    np.testing.assert_almost_equal(sum(shares[f"share_{c}_0"] for c in CHOICES), 1.0)
+
+    utility = QUANTITIES["lifetime_utility"](simulate(params), params)
+    np.testing.assert_almost_equal(utility["lifetime_utility"], sum(0.95 ** np.arange(4)))
@@ -1,26 +1,69 @@
 import pandas as pd
+import pytest
 import numpy as np
 import respy as rp
 
 from uq_auxiliary import transform_params_kw94_respy
+from uq_auxiliary import transform_params_kw94_respy_batch
 from uq_configurations import INPUT_DIR
 
 
-def test_transform_datasets():
+# TODO: For some reason this test fails for the third dataset. This needs to be further
+#  investigated later, see the notes in table43_kw_94.csv.
+@pytest.mark.parametrize(
+    "count, dataset",
+    [(0, "one"), (1, "two"), pytest.param(2, "three", marks=pytest.mark.xfail)],
+)
+def test_transform_datasets(count, dataset):
     """ Test whether the transformations work for the baseline parameterization.
     """
-    for count, dataset in enumerate(["one", "two"]):
-        par_name = f"kw_94_{dataset}"
-        csv_name = f"{INPUT_DIR}/table4{count + 1}_kw_94.csv"
+    par_name = f"kw_94_{dataset}"
+    csv_name = f"{INPUT_DIR}/table4{count + 1}_kw_94.csv"
 
-        par_respy, _ = rp.get_example_model(par_name, with_data=False)
-        par_respy = par_respy["value"].to_numpy()
+    par_respy, _ = rp.get_example_model(par_name, with_data=False)
+    par_respy = par_respy["value"].to_numpy()
 
-        df = pd.read_csv(csv_name, sep=",")
-        par_uq = pd.Series(data=df["true"].values, index=df["parameter"].values)
-        par_uq = transform_params_kw94_respy(par_uq).to_numpy()
+    df = pd.read_csv(csv_name, sep=",")
+    par_uq = pd.Series(data=df["true"].values, index=df["parameter"].values)
+    par_uq = transform_params_kw94_respy(par_uq, par_name).to_numpy()
 
-        # TODO: For some reason this test fails for the third dataset. This needs to be further
-        #  investigated later.
-        if dataset != 'three':
-            np.testing.assert_almost_equal(par_respy, par_uq)
+    np.testing.assert_almost_equal(par_respy, par_uq)
+
+
+def test_transform_batch():
+    """ Test whether the batch transformation agrees with an explicit computation for each draw.
+    """
+    df = pd.read_csv(f"{INPUT_DIR}/table41_kw_94.csv", sep=",")
+    params, _ = rp.get_example_model("kw_94_one", with_data=False)
+
+    np.random.seed(123)
+    samples = df["true"].values + np.random.normal(size=(10, 26)) * df["sd"].values
+
+    rslt = transform_params_kw94_respy_batch(samples, df["parameter"].values, params, True)
+
+    for sample, (_, batch_sample) in zip(samples, rslt.iterrows()):
+        sample = pd.Series(data=sample, index=df["parameter"].values)
+
+        chol = np.zeros((4, 4))
+        np.fill_diagonal(chol, sample[["a11", "a22", "a33", "a44"]])
+        chol[1, 0] = sample["a21"]
+        chol[2, :2] = sample[["a31", "a32"]]
+        chol[3, :3] = sample[["a41", "a42", "a43"]]
+
+        cov = chol @ chol.T
+        sd = np.sqrt(np.diag(cov))
+
+        expected = {
+            ("shocks_sdcorr", "sd_a"): sd[0],
+            ("shocks_sdcorr", "sd_home"): sd[3],
+            ("shocks_sdcorr", "corr_b_a"): cov[1, 0] / (sd[1] * sd[0]),
+            ("shocks_sdcorr", "corr_home_edu"): cov[3, 2] / (sd[3] * sd[2]),
+            ("wage_a", "constant"): sample["alpha10"],
+            ("wage_a", "exp_a_square"): -sample["alpha13"],
+            ("wage_b", "exp_a_square"): -sample["alpha25"],
+            ("wage_b", "exp_a"): sample["alpha24"],
+            ("nonpec_edu", "not_edu_last_period"): -sample["beta2"],
+            ("delta", "delta"): params.loc[("delta", "delta"), "value"],
+        }
+        for name, value in expected.items():
+            np.testing.assert_almost_equal(batch_sample[name], value)
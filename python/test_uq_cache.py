@@ -0,0 +1,32 @@
+import numpy as np
+
+from uq_cache import get_cache_key
+from uq_cache import ENTRY_OVERHEAD
+from uq_cache import write_cache
+from uq_cache import read_cache
+from uq_cache import open_cache
+
+
+def test_cache_lru(tmp_path):
+    """ Test whether evaluations are recovered and the least recently used ones are evicted.
+    """
+    cache = open_cache(tmp_path / "cache.uq.db", max_size=2 * (ENTRY_OVERHEAD + 3))
+    options = {"simulation_agents": 1000, "simulation_seed": 132}
+
+    keys = [get_cache_key(np.full(26, i), options, 500.0) for i in range(3)]
+    assert get_cache_key(np.full(26, 0), options, 0.0) != keys[0]
+
+    write_cache(cache, keys[0], 1.5)
+    write_cache(cache, keys[1], 1.4)
+    assert read_cache(cache, keys[0]) == 1.5
+
+    # The second entry is now the least recently used one.
+    write_cache(cache, keys[2], 1.3)
+    assert read_cache(cache, keys[1]) is None
+    assert read_cache(cache, keys[0]) == 1.5
+    assert read_cache(cache, keys[2]) == 1.3
+
+    # A large value takes the place of several small ones.
+    write_cache(cache, keys[1], list(range(100)))
+    assert read_cache(cache, keys[0]) is None and read_cache(cache, keys[2]) is None
+    assert read_cache(cache, keys[1]) == list(range(100))
@@ -0,0 +1,35 @@
+from scipy.optimize import approx_fprime
+import numpy as np
+
+from uq_emulator import get_negative_log_likelihood
+from uq_emulator import predict_emulator
+from uq_emulator import get_active_batch
+from uq_emulator import fit_emulator
+
+
+def test_emulator():
+    """ Test whether the emulator learns a smooth function and spreads out its designs.
+    """
+    np.random.seed(123)
+    z = np.random.normal(size=(60, 5))
+    evals = np.sin(z[:, 0]) + 0.5 * z[:, 1] ** 2
+
+    theta = np.random.normal(size=7) * 0.3
+    value, gradient = get_negative_log_likelihood(theta, z, evals)
+    numerical = approx_fprime(theta, lambda x: get_negative_log_likelihood(x, z, evals)[0], 1e-6)
+    np.testing.assert_allclose(gradient, numerical, rtol=1e-4, atol=1e-4)
+
+    emulator = fit_emulator(z, evals)
+
+    # The irrelevant parameters are switched off by long length scales.
+    assert emulator["lengthscales"][2:].min() > 5 * emulator["lengthscales"][:2].max()
+
+    z_test = np.random.normal(size=(1000, 5))
+    mean, variance = predict_emulator(emulator, z_test)
+    truth = np.sin(z_test[:, 0]) + 0.5 * z_test[:, 1] ** 2
+    assert np.sqrt(np.mean((mean - truth) ** 2)) < 0.1 * truth.std()
+
+    # The design points are not selected again and the batch consists of distinct points.
+    candidates = np.vstack((z[:5], np.random.normal(size=(200, 5))))
+    batch = get_active_batch(emulator, candidates, 4)
+    assert len(set(batch)) == 4 and not set(batch) & set(range(5))
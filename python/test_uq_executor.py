@@ -0,0 +1,21 @@
+import pytest
+
+from uq_executor import get_executor
+from uq_executor import map_ordered
+from uq_executor import BACKENDS
+
+
+def square(x):
+    return x ** 2
+
+
+@pytest.mark.parametrize("backend", [backend for backend in BACKENDS if backend != "dask"])
+def test_executor_backends(backend):
+    """ Test whether all backends return the same results irrespective of the chunk size.
+    """
+    tasks, rslt = list(range(23)), [square(task) for task in range(23)]
+
+    for chunk_size in [1, 5]:
+        with get_executor(backend, 2) as imap_unordered:
+            assert sorted(imap_unordered(square, tasks, chunk_size)) == rslt
+            assert map_ordered(imap_unordered, square, tasks, chunk_size) == rslt
@@ -0,0 +1,32 @@
+import numpy as np
+
+from uq_multilevel import get_multilevel_estimate
+from uq_multilevel import get_optimal_allocation
+from uq_multilevel import get_level_costs
+
+
+def test_optimal_allocation():
+    """ Test whether the allocation reaches the target precision and favors the cheap levels.
+    """
+    variances, costs = np.array([1.0, 0.1, 0.01]), np.array([1.0, 4.0, 16.0])
+
+    num_draws = get_optimal_allocation(variances, costs, 0.01)
+
+    assert np.sum(variances / num_draws) <= 0.01 ** 2
+    assert np.all(np.diff(num_draws) < 0)
+
+    # With equal costs, the allocation is proportional to the standard deviations.
+    num_draws = get_optimal_allocation([4.0, 1.0], [1.0, 1.0], 0.1)
+    np.testing.assert_allclose(num_draws, [600, 300], atol=1)
+
+    np.random.seed(123)
+    differences = [np.random.normal(1.0, 1.0, 10000), np.random.normal(0.5, 0.1, 100)]
+    estimate, se = get_multilevel_estimate(differences)
+    np.testing.assert_allclose([estimate, se], [1.5, 0.0141], atol=0.03)
+
+
+def test_level_costs():
+    """ Test whether levels without measured costs are assigned the largest measured cost.
+    """
+    np.testing.assert_equal(get_level_costs([[1.0, 3.0], [], [4.0]]), [2.0, 4.0, 4.0])
+    np.testing.assert_equal(get_level_costs([[], []]), [1.0, 1.0])
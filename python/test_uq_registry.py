@@ -0,0 +1,27 @@
+import pandas as pd
+
+from uq_registry import get_input_table
+from uq_registry import clear_registry
+from uq_registry import TABLES
+import uq_registry
+
+
+def test_input_table_handouts(monkeypatch):
+    """ Test whether tables are read only once and changes to a handout do not leak.
+    """
+    clear_registry()
+
+    calls, original = list(), pd.read_csv
+
+    def read_csv(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(uq_registry.pd, "read_csv", read_csv)
+
+    df = get_input_table("table41_kw_94")
+    df.loc[0, "true"] = -999.0
+
+    assert get_input_table("table41_kw_94").loc[0, "true"] != -999.0
+    assert get_input_table("table41_kw_94") is not TABLES["table41_kw_94"]
+    assert len(calls) == 1
@@ -0,0 +1,52 @@
+import numpy as np
+
+from uq_reweighting import get_mixture_log_density
+from uq_reweighting import get_effective_sample_size
+from uq_reweighting import get_importance_weights
+from uq_reweighting import get_weighted_quantiles
+from uq_reweighting import get_num_fallback_draws
+from uq_reweighting import get_weighted_moments
+from uq_reweighting import get_log_density
+
+
+def test_reweighting_shifted_normal():
+    """ Test whether reweighting draws to a shifted normal recovers its moments and quantiles.
+    """
+    np.random.seed(123)
+    samples = np.random.normal(size=(200000, 1))
+    source, target = (np.zeros(1), np.ones(1)), (np.full(1, 0.5), -np.ones(1))
+
+    log_source = get_log_density(samples, *source)
+    weights = get_importance_weights(get_log_density(samples, *target), log_source)
+
+    # For a shift by delta, the ESS is exp(-delta ** 2) times the number of draws.
+    ess = get_effective_sample_size(weights)
+    np.testing.assert_allclose(ess / len(samples), np.exp(-0.25), rtol=0.02)
+
+    mean, sd = get_weighted_moments(samples, weights)
+    np.testing.assert_allclose([mean[0], sd[0]], [0.5, 1.0], atol=0.01)
+
+    quantiles = get_weighted_quantiles(samples, weights, [0.05, 0.5, 0.95])
+    np.testing.assert_allclose(quantiles[:, 0], [-1.1449, 0.5, 2.1449], atol=0.02)
+
+    # A mixture of identical components is the same distribution.
+    log_mixture = get_mixture_log_density(samples[:10], [source, source], [3, 7])
+    np.testing.assert_almost_equal(log_mixture, log_source[:10])
+
+
+def test_fallback_draws_reach_ess():
+    """ Test whether the new draws lift the effective sample size of the mixture to its minimum.
+    """
+    np.random.seed(123)
+    samples = np.random.normal(size=(20, 2))
+    components = [(np.zeros(2), np.ones(2)), (np.full(2, 4.0), np.ones(2))]
+
+    def sample_target(num_draws):
+        np.random.seed(456)
+        return np.random.normal(loc=4.0, size=(num_draws, 2))
+
+    new_samples, ess = get_num_fallback_draws(samples, components, 50, sample_target, 1000)
+    assert ess >= 50 and len(new_samples) < 1000
+
+    new_samples, ess = get_num_fallback_draws(samples, components, 50, sample_target, 10)
+    assert ess < 50 and len(new_samples) == 10
@@ -0,0 +1,30 @@
+import pandas as pd
+import numpy as np
+
+from uq_screening import get_standardized_points
+from uq_screening import get_morris_trajectories
+from uq_screening import get_elementary_effects
+from uq_screening import get_morris_indices
+from uq_screening import get_reduced_table
+
+
+def test_morris_linear():
+    """ Test whether the elementary effects of a linear function are its coefficients.
+    """
+    np.random.seed(123)
+    weights = np.array([2.0, -1.0, 0.0, 0.5])
+
+    trajectories = get_morris_trajectories(4, 10)
+    assert trajectories.min() >= 0 and trajectories.max() <= 1
+    assert np.all((np.diff(trajectories, axis=1) != 0).sum(axis=2) == 1)
+    assert np.all(np.isfinite(get_standardized_points(trajectories)))
+
+    effects = get_elementary_effects(trajectories @ weights, trajectories)
+    rslt = get_morris_indices(effects, ["x0", "x1", "x2", "x3"])
+
+    np.testing.assert_almost_equal(rslt["mu"].values, weights)
+    np.testing.assert_almost_equal(rslt["mu_star"].values, np.abs(weights))
+    np.testing.assert_almost_equal(rslt["sigma"].values, 0.0)
+
+    table = pd.DataFrame({"parameter": rslt.index, "true": 1.0, "sd": 0.1})
+    np.testing.assert_equal(get_reduced_table(table, rslt)["sd"].values, [0.1, 0.1, 0.0, 0.1])
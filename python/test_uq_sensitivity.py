@@ -0,0 +1,26 @@
+import numpy as np
+
+from uq_sensitivity import get_saltelli_design
+from uq_sensitivity import get_unique_design
+from uq_sensitivity import get_sobol_indices
+
+
+def test_sobol_indices_linear():
+    """ Test whether the Sobol indices of a linear function are recovered.
+    """
+    np.random.seed(123)
+    mean, sd = np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 0.0])
+    weights = np.array([1.0, 1.0, 5.0])
+
+    design = get_saltelli_design(mean, sd, 4096, sampler="random")
+    unique, inverse = get_unique_design(design)
+
+    # The last parameter is fixed, so its columns of the design do not require evaluations.
+    assert len(unique) == 4096 * 4
+
+    evals = np.dot(unique, weights)[inverse]
+    rslt = get_sobol_indices(evals, ["x0", "x1", "x2"], num_bootstrap=100)
+
+    np.testing.assert_almost_equal(rslt["first"].values, [0.2, 0.8, 0.0], decimal=1)
+    np.testing.assert_almost_equal(rslt["total"].values, [0.2, 0.8, 0.0], decimal=1)
+    assert (rslt["first_lower"] <= rslt["first_upper"]).all()
@@ -0,0 +1,64 @@
+import numpy as np
+
+from uq_statistics import get_streaming_moments
+from uq_statistics import update_streaming_moments
+from uq_statistics import get_standard_error
+from uq_statistics import get_control_variate_estimate
+from uq_statistics import get_bootstrap_exceedances
+from uq_statistics import get_bootstrap_quantiles
+from uq_statistics import get_bootstrap_moments
+
+
+def test_streaming_moments():
+    """ Test whether the streaming moments agree with the moments of the full sample.
+    """
+    np.random.seed(123)
+    values = 1.5 + 0.1 * np.random.normal(size=(1000, 2))
+
+    moments = get_streaming_moments(2)
+    for value in values:
+        update_streaming_moments(moments, value)
+
+    np.testing.assert_almost_equal(moments["mean"], values.mean(axis=0))
+    np.testing.assert_almost_equal(
+        get_standard_error(moments), values.std(axis=0, ddof=1) / np.sqrt(1000)
+    )
+
+
+def test_control_variates():
+    """ Test whether control variates reduce the variance of an almost linear quantity.
+    """
+    np.random.seed(123)
+    z = np.random.normal(size=(500, 3))
+    evals = 2.0 + z @ [1.0, 0.5, 0.0] + 0.1 * np.random.normal(size=500)
+
+    rslt = get_control_variate_estimate(evals, z)
+
+    np.testing.assert_allclose(rslt["mean"], 2.0, atol=3 * rslt["se"])
+    np.testing.assert_allclose(rslt["se"], 0.1 / np.sqrt(500), rtol=0.1)
+    assert rslt["reduction"] > 100
+
+
+def test_bootstrap():
+    """ Test whether the vectorized bootstrap agrees with resampling in a loop.
+    """
+    np.random.seed(123)
+    values = np.random.exponential(size=(200, 2))
+
+    replicates = list()
+    for _ in range(5000):
+        resampled = values[np.random.randint(200, size=200)]
+        # The lower order statistics of the 10% and 90% quantiles of 200 draws.
+        replicates.append(np.sort(resampled, axis=0)[[19, 179]])
+    replicates = np.array(replicates)
+
+    rslt = get_bootstrap_quantiles(values, [0.1, 0.9], 5000)
+    np.testing.assert_allclose(rslt.mean(axis=0), replicates.mean(axis=0), rtol=0.02)
+    np.testing.assert_allclose(rslt.std(axis=0), replicates.std(axis=0), rtol=0.1)
+
+    mean, variance = get_bootstrap_moments(values, 5000)
+    np.testing.assert_allclose(mean.std(axis=0), values.std(axis=0) / np.sqrt(200), rtol=0.1)
+    np.testing.assert_allclose(variance.mean(axis=0), values.var(axis=0, ddof=1), rtol=0.05)
+
+    rslt = get_bootstrap_exceedances(values, [1.0], 5000)
+    np.testing.assert_allclose(rslt.mean(axis=0)[0], np.mean(values > 1.0, axis=0), atol=0.01)
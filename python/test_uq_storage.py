@@ -0,0 +1,52 @@
+import pandas as pd
+import numpy as np
+
+from uq_storage import resume_chunks
+from uq_storage import reset_chunks
+from uq_storage import write_chunk
+from uq_storage import save_mc_params
+from uq_storage import load_mc_params
+from uq_storage import load_mc_param
+from uq_storage import load_chunks
+
+
+def test_chunks_resume(tmp_path):
+    """ Test whether results written in chunks are recovered after resuming a run.
+    """
+    chunk_dir = tmp_path / "mc_chunks"
+    metadata = {"seed": 123, "num_draws": 6, "sampler": "random"}
+
+    reset_chunks(chunk_dir, metadata)
+    for iterations in [[3, 0], [5]]:
+        df = pd.DataFrame(np.array(iterations) * 0.1, columns=["avg_schooling"], index=iterations)
+        write_chunk(chunk_dir, df)
+
+    resume_chunks(chunk_dir, metadata)
+
+    df = load_chunks(chunk_dir)
+    np.testing.assert_equal(df.index.values, [0, 3, 5])
+    np.testing.assert_almost_equal(df["avg_schooling"].values, [0.0, 0.3, 0.5])
+
+    # A gap in the chunks does not lead to overwriting one of them.
+    (chunk_dir / "chunk_000000.uq.pkl").unlink()
+    write_chunk(chunk_dir, pd.DataFrame([0.7], columns=["avg_schooling"], index=[7]))
+    np.testing.assert_equal(load_chunks(chunk_dir).index.values, [5, 7])
+
+
+def test_mc_params_columns(tmp_path):
+    """ Test whether single parameters are recovered from the memory-mapped matrix.
+    """
+    columns = pd.MultiIndex.from_tuples(
+        [("delta", "delta"), ("wage_a", "constant"), ("wage_a", "exp_edu")],
+        names=["category", "name"],
+    )
+    params = np.random.normal(size=(20, 3))
+
+    save_mc_params(tmp_path, params, columns)
+
+    values, stored = load_mc_params(tmp_path)
+    np.testing.assert_equal(values, params)
+    assert stored.equals(columns)
+
+    for i, name in enumerate(columns):
+        np.testing.assert_equal(load_mc_param(tmp_path, name), params[:, i])
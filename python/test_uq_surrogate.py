@@ -0,0 +1,68 @@
+import numpy as np
+
+from uq_surrogate import get_delta_contributions
+from uq_surrogate import get_difference_design
+from uq_surrogate import fit_surrogate_spectral
+from uq_surrogate import fit_surrogate_delta
+from uq_surrogate import get_surrogate_quantiles
+from uq_surrogate import get_quadrature_design
+from uq_surrogate import evaluate_surrogate
+from uq_surrogate import fit_surrogate
+
+
+def quadratic(samples, mean, sd):
+    z = (samples - mean) / sd
+    return 1.0 + 2.0 * z[:, 0] + z[:, 1] ** 2 - z[:, 1] * z[:, 2]
+
+
+def test_surrogate_moments():
+    """ Test whether both fitting methods recover a quadratic function and its moments.
+    """
+    mean, sd = np.array([9.21, 0.038, -0.0005]), np.array([0.0016, 0.00016, 0.000011])
+
+    np.random.seed(123)
+    samples = mean + np.random.normal(size=(100, 3)) * sd
+    surrogates = [fit_surrogate(samples, quadratic(samples, mean, sd), mean, sd, order=2)]
+
+    samples, weights = get_quadrature_design(mean, sd, order=2)
+    evals = quadratic(samples, mean, sd)
+    surrogates.append(fit_surrogate_spectral(samples, weights, evals, mean, sd, order=2))
+
+    points = mean + np.random.normal(size=(10, 3)) * sd
+    median = np.median(quadratic(mean + np.random.normal(size=(100000, 3)) * sd, mean, sd))
+    for surrogate in surrogates:
+        np.testing.assert_almost_equal(surrogate["expectation"], 2.0)
+        np.testing.assert_almost_equal(surrogate["variance"], 7.0)
+        np.testing.assert_almost_equal(
+            evaluate_surrogate(surrogate, points), quadratic(points, mean, sd)
+        )
+        np.testing.assert_almost_equal(get_surrogate_quantiles(surrogate, 0.5), median, decimal=1)
+
+
+def test_surrogate_delta():
+    """ Test whether the delta method is exact for a linear function.
+    """
+    mean, sd = np.array([1.0, 2.0, 3.0]), np.array([0.1, -0.2, 0.3])
+    weights = np.array([2.0, -1.0, 0.5])
+
+    samples = get_difference_design(mean, sd)
+    assert samples.shape == (7, 3)
+
+    surrogate = fit_surrogate_delta(1.0 + samples @ weights, mean, sd)
+
+    np.testing.assert_almost_equal(surrogate["gradient"], weights)
+    np.testing.assert_almost_equal(surrogate["expectation"], 1.0 + mean @ weights)
+    np.testing.assert_almost_equal(surrogate["variance"], np.sum((weights * sd) ** 2))
+
+    cov = np.diag(sd ** 2)
+    cov[0, 1] = cov[1, 0] = 0.01
+    variance, shares = get_delta_contributions(surrogate["gradient"], cov)
+    np.testing.assert_almost_equal(variance, weights @ cov @ weights)
+    np.testing.assert_almost_equal(shares.sum(), 1.0)
+
+    # With the full covariance matrix, the summary is the one of the normal distribution.
+    surrogate = fit_surrogate_delta(1.0 + samples @ weights, mean, sd, cov=cov)
+    np.testing.assert_almost_equal(surrogate["variance"], variance)
+    quantiles = get_surrogate_quantiles(surrogate, [0.05, 0.95]) - surrogate["expectation"]
+    np.testing.assert_allclose(quantiles, np.array([-1.6449, 1.6449]) * np.sqrt(variance),
+                               rtol=0.01)
@@ -1,113 +1,466 @@
-import numpy as np
-import respy as rp
+import warnings
 
+import numpy as np
 import pandas as pd
 
-from uq_configurations import INPUT_DIR
+from uq_cache import get_cache_key
+from uq_cache import write_cache
+from uq_cache import read_cache
+from uq_cache import open_cache
+from uq_timing import start_trace
+from uq_timing import timed
+from uq_registry import get_example_model
+from uq_registry import get_simulate_func
+from uq_registry import get_kw94_index
+from uq_registry import get_input_table
+
+# These parameters are not part of KW94 and simply copied from the respy specification.
+KW94_FIXED = [
+    ("delta", "delta"),
+    ("meas_error", "sd_a"),
+    ("meas_error", "sd_b"),
+    ("lagged_choice_1_edu", "edu_ten"),
+    ("initial_exp_edu", "10"),
+    ("maximum_exp", "edu"),
+]
+
+# These parameters map directly to KW94, the third element is the sign applied by respy.
+KW94_DIRECT = [
+    # square experiences alphas
+    (("wage_a", "exp_a_square"), "alpha13", -1),
+    (("wage_a", "exp_b_square"), "alpha15", -1),
+    (("wage_b", "exp_b_square"), "alpha23", -1),
+    (("wage_b", "exp_a_square"), "alpha25", -1),
+    # betas
+    (("nonpec_edu", "at_least_twelve_exp_edu"), "beta1", -1),
+    (("nonpec_edu", "not_edu_last_period"), "beta2", -1),
+    # alphas
+    (("wage_a", "constant"), "alpha10", 1),
+    (("wage_a", "exp_edu"), "alpha11", 1),
+    (("wage_a", "exp_a"), "alpha12", 1),
+    (("wage_a", "exp_b"), "alpha14", 1),
+    (("wage_b", "constant"), "alpha20", 1),
+    (("wage_b", "exp_edu"), "alpha21", 1),
+    # second number behind alpha switched compared to above
+    (("wage_b", "exp_a"), "alpha24", 1),
+    (("wage_b", "exp_b"), "alpha22", 1),
+    # betas
+    (("nonpec_edu", "constant"), "beta0", 1),
+    # gamma
+    (("nonpec_home", "constant"), "gamma0", 1),
+]
+
+# The elements of the lower-triangular Cholesky factor in row-major order.
+KW94_CHOLESKY = ["a11", "a21", "a22", "a31", "a32", "a33", "a41", "a42", "a43", "a44"]
+
+SHOCK_LABELS = ["a", "b", "edu", "home"]
+
+# The alternatives of the KW94 model in the order of respy.
+CHOICES = ["a", "b", "edu", "home"]
+
+# The three specifications of KW94 and the tables with the distribution of their parameters.
+SPECS = {
+    "kw_94_one": "table41_kw_94",
+    "kw_94_two": "table42_kw_94",
+    "kw_94_three": "table43_kw_94",
+}
+
+# The means of these tables do not reproduce the parameters of the respy specification, see the
+# notes in the table itself.
+UNVERIFIED_SPECS = ["kw_94_three"]
+
+# Each worker process keeps its own copy of the simulation setup. It is populated once by
+# init_worker() when the pool starts and then reused for all draws handled by that process.
+WORKER_CACHE = dict()
+
+
+def get_spec_table(spec, table=None):
+    """Get the input table of a specification or the one given instead, e.g. a reduced one."""
+    if table is None and spec in UNVERIFIED_SPECS:
+        warnings.warn(f"The means of {SPECS[spec]} do not reproduce the parameters of {spec}.")
+
+    return get_input_table(SPECS[spec] if table is None else table)
+
+
+def init_worker(num_agents=None, tuition_subsidies=(500.0,), cache=None, trace=None,
+                quantities=("avg_schooling",), specs=("kw_94_one",)):
+    """Set up the simulation machinery once for each worker process.
+
+    This is used as the initializer of the multiprocessing pool. Building the simulate
+    function creates the state space and the shocks, which is the expensive part of the
+    setup and does not depend on the parameter values. We do so for each of the requested
+    specifications, so that a single pool serves draws for all of them. If a cache file is
+    given, the evaluations are looked up there first. If a trace file is given, the time spent
+    in each stage is recorded there.
+    """
+    if trace is not None:
+        start_trace(trace)
+
+    with timed("read_csv"):
+        index = get_kw94_index()
+
+    WORKER_CACHE["specs"] = dict()
+    WORKER_CACHE["num_agents"] = num_agents
+    WORKER_CACHE["index"] = index
+    WORKER_CACHE["tuition_subsidies"] = list(tuition_subsidies)
+    WORKER_CACHE["quantities"] = list(quantities)
+    WORKER_CACHE["cache"] = None if cache is None else open_cache(cache)
+
+    for spec in specs:
+        get_worker_spec(spec)
+
+
+def get_worker_spec(spec, options=None):
+    """Get the base model and simulate function of a specification in the worker process.
+
+    Specifications that were not requested at startup are set up on first use. The options
+    allow to change the respy options of the specification, for example to evaluate it at a
+    lower fidelity, and each variant is set up separately.
+    """
+    options = dict() if options is None else options
+
+    key = (spec,) + tuple(sorted(options.items()))
+    if key not in WORKER_CACHE["specs"]:
+        with timed("get_example_model"):
+            base_params, base_options = get_example_model(spec)
+
+        if WORKER_CACHE["num_agents"] is not None:
+            base_options["simulation_agents"] = WORKER_CACHE["num_agents"]
+        base_options.update(options)
+
+        with timed("get_simulate_func"):
+            simulate = get_simulate_func(base_params, base_options)
+
+        WORKER_CACHE["specs"][key] = {
+            "simulate": simulate,
+            "base_params": base_params,
+            "base_options": base_options,
+        }
+
+    return WORKER_CACHE["specs"][key]
 
 
 def get_quantity_of_interest(sample):
 
-    # We need the baseline options and a grid for the indices. It does not matter which of the
-    # three KW94 specifications we use here.
-    base_params, base_options = rp.get_example_model("kw_94_one", with_data=False)
-    index = pd.read_csv(f"{INPUT_DIR}/table41_kw_94.csv", sep=",")["parameter"].values
+    return get_quantities_of_interest(sample, [500.0], ["avg_schooling"])[("avg_schooling", 500.0)]
+
+
+def get_quantities_of_interest(sample, tuition_subsidies=None, quantities=None,
+                               spec="kw_94_one", options=None):
+    """Evaluate the effects of a list of tuition subsidies on several quantities for one sample.
+
+    Without explicit lists, we use the subsidies and quantities the worker process was set up
+    with. The result is indexed by the name of the statistic and the subsidy. The options
+    change the respy options of the specification.
+    """
+    # Outside of a pool, we set up the process with the defaults on the first call and reuse
+    # the simulate function for all later ones.
+    if not WORKER_CACHE:
+        init_worker()
+
+    setup = get_worker_spec(spec, options)
+    simulate = setup["simulate"]
+    base_params = setup["base_params"]
+    base_options = setup["base_options"]
+    index = WORKER_CACHE["index"]
+    cache = WORKER_CACHE["cache"]
+    if tuition_subsidies is None:
+        tuition_subsidies = WORKER_CACHE["tuition_subsidies"]
+    if quantities is None:
+        quantities = WORKER_CACHE["quantities"]
+
+    tuition_subsidies = [float(subsidy) for subsidy in tuition_subsidies]
+
+    # We only need to simulate the scenarios that are not available in the cache.
+    effects = dict()
+    if cache is not None:
+        with timed("read_cache"):
+            keys = {
+                subsidy: get_cache_key(sample, base_options, subsidy, quantities, spec)
+                for subsidy in tuition_subsidies
+            }
+            for subsidy, key in keys.items():
+                value = read_cache(cache, key)
+                if value is not None:
+                    effects[subsidy] = value
+
+    missing = [subsidy for subsidy in tuition_subsidies if subsidy not in effects]
+    if missing:
+        with timed("transform"):
+            param_sample = transform_params_kw94_respy_batch(sample, index, base_params)
+            param_sample = pd.DataFrame(
+                param_sample[0], columns=["value"], index=base_params.index
+            )
+
+        rslt = get_policy_effects(param_sample, simulate, missing, quantities)
+        for subsidy in missing:
+            effects[subsidy] = rslt.xs(subsidy, level="tuition_subsidy").to_dict()
+
+        if cache is not None:
+            with timed("write_cache"):
+                for subsidy in missing:
+                    write_cache(cache, keys[subsidy], effects[subsidy])
+
+    return get_effects_series(effects, tuition_subsidies)
+
+
+def get_quantity_of_interest_iteration(task):
+    """Evaluate the quantities of interest for a tuple of key and sample.
+
+    The key is a pair of specification and iteration. It is passed through so that results can
+    be matched to their draws when they arrive out of order.
+    """
+    key, sample = task
+
+    return key, get_quantities_of_interest(sample, spec=key[0])
+
+
+def get_policy_effects(params, simulate, tuition_subsidies, quantities=("avg_schooling",)):
+    """Evaluate the effects on all quantities for a whole list of tuition subsidies.
+
+    The baseline is only simulated once and all scenarios share the same simulated agents and
+    shocks, so that only the solution of the model differs. These common random numbers remove
+    most of the simulation noise from the differences. All quantities are computed from the same
+    simulated panel.
+    """
+    base_stats = simulate_statistics(simulate, params, quantities)
+
+    effects = dict()
+    for tuition_subsidy in tuition_subsidies:
+        # There is no need to simulate the baseline a second time.
+        if tuition_subsidy == 0:
+            effects[tuition_subsidy] = {label: 0.0 for label in base_stats}
+            continue
+        policy_params = get_policy_params(params, tuition_subsidy)
+        policy_stats = simulate_statistics(simulate, policy_params, quantities)
+        effects[tuition_subsidy] = {
+            label: policy_stats[label] - base_stats[label] for label in base_stats
+        }
+
+    return get_effects_series(effects, tuition_subsidies)
+
+
+def get_effects_series(effects, tuition_subsidies):
+    """Collect the effects for each subsidy in a Series indexed by statistic and subsidy."""
+    labels = list(effects[tuition_subsidies[0]])
+
+    index, values = list(), list()
+    for label in labels:
+        for tuition_subsidy in tuition_subsidies:
+            index.append((label, float(tuition_subsidy)))
+            values.append(effects[tuition_subsidy][label])
+
+    index = pd.MultiIndex.from_tuples(index, names=["quantity", "tuition_subsidy"])
+
+    return pd.Series(values, index=index)
+
 
-    sample = pd.Series(data=sample, index=index)
-    param_sample = transform_params_kw94_respy(sample)
-    param_sample = pd.DataFrame(param_sample, columns=["value"])
+def drop_single_subsidy(df):
+    """Keep the simple layout of one column per quantity if there is only a single subsidy."""
+    if len(df.columns.unique("tuition_subsidy")) == 1:
+        df = df.droplevel("tuition_subsidy", axis=1)
 
-    policy_edu, _ = model_wrapper_kw_94(param_sample, base_options, 500.0)
-    base_edu, _ = model_wrapper_kw_94(param_sample, base_options, 0.0)
+    return df
 
-    return policy_edu - base_edu
 
+def simulate_statistics(simulate, params, quantities):
+    """Simulate the model and reduce the panel to all requested statistics right away.
 
-def model_wrapper_kw_94(params, base_options, tuition_subsidy):
-    # TODO: This needs to done only once during the whole script. However, this requires me to
-    #  set up a more complicated structure for the parallelism and so we will simply postpone
-    #  this until we have a more serious application.
-    simulate = rp.get_simulate_func(params, base_options)
+    The simulated panel is the largest object in each worker, so we do not hold on to it any
+    longer than necessary.
+    """
+    with timed("simulate"):
+        df = simulate(params)
+
+    stats = dict()
+    with timed("reduce"):
+        for name in quantities:
+            stats.update(QUANTITIES[name](df, params))
+
+    return stats
+
+
+def model_wrapper_kw_94(params, base_options, tuition_subsidy, simulate=None, return_df=False):
+
+    # The simulate function only depends on the options and can thus be shared across calls
+    # with different parameters.
+    if simulate is None:
+        simulate = get_simulate_func(params, base_options)
+
+    policy_df = simulate(get_policy_params(params, tuition_subsidy))
+
+    edu = get_average_schooling(policy_df)
+
+    # The simulated panel is only returned on request.
+    if not return_df:
+        policy_df = None
+
+    return edu, policy_df
+
+
+def get_policy_params(params, tuition_subsidy):
 
     policy_params = params.copy()
     policy_params.loc[("nonpec_edu", "at_least_twelve_exp_edu"), "value"] += tuition_subsidy
-    policy_df = simulate(policy_params)
 
-    edu = policy_df.groupby("Identifier")["Experience_Edu"].max().mean()
+    return policy_params
 
-    return edu, policy_df
 
+def get_average_schooling(df):
+    """Compute the average over agents of their maximum years of schooling.
+
+    We work on the underlying arrays instead of grouping the DataFrame. The panel is sorted by
+    identifier, so each agent is a contiguous block of rows and its maximum is a single
+    reduction over that block.
+    """
+    identifier = get_panel_array(df, "Identifier")
+    edu = get_panel_array(df, "Experience_Edu")
+
+    if np.any(identifier[1:] < identifier[:-1]):
+        order = np.argsort(identifier, kind="stable")
+        identifier, edu = identifier[order], edu[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], identifier[1:] != identifier[:-1])))
+
+    return np.maximum.reduceat(edu, starts).mean()
+
+
+def get_panel_array(df, name):
+    """Access a variable of the simulated panel, which might also be a level of its index."""
+    if name in df.columns:
+        return df[name].to_numpy()
+
+    return df.index.get_level_values(name).to_numpy()
+
+
+def get_choice_codes(df):
+    """Map the choices in the simulated panel to their position in CHOICES."""
+    choice = get_panel_array(df, "Choice")
+    if np.issubdtype(choice.dtype, np.number):
+        return choice.astype(int)
+
+    return pd.Categorical(choice, categories=CHOICES).codes
+
+
+def reduce_average_schooling(df, params):
+
+    return {"avg_schooling": get_average_schooling(df)}
+
+
+def reduce_occupation_shares(df, params):
+    """Compute the share of agents in each alternative by period."""
+    period = get_panel_array(df, "Period").astype(int)
+    codes = get_choice_codes(df)
+
+    num_periods = period.max() + 1
+    counts = np.bincount(period * len(CHOICES) + codes, minlength=num_periods * len(CHOICES))
+    counts = counts.reshape(num_periods, len(CHOICES))
+    shares = counts / counts.sum(axis=1, keepdims=True)
 
-def transform_params_kw94_respy(kw94_params):
+    return {
+        f"share_{choice}_{period}": shares[period, i]
+        for period in range(num_periods)
+        for i, choice in enumerate(CHOICES)
+    }
+
+
+def reduce_mean_log_wage(df, params):
+    """Compute the mean of log wages over all periods with an observed wage."""
+    wage = get_panel_array(df, "Wage").astype(float)
+    is_working = np.isfinite(wage) & (wage > 0)
+
+    return {"mean_log_wage": np.log(wage[is_working]).mean()}
+
+
+def reduce_lifetime_utility(df, params):
+    """Compute the average over agents of the discounted flow utilities of their choices."""
+    period = get_panel_array(df, "Period").astype(int)
+    codes = get_choice_codes(df)
+
+    # The capitalization of the utility columns differs across versions of respy.
+    columns = {column.lower(): column for column in df.columns}
+    flow = np.column_stack(
+        [df[columns[f"flow_utility_{choice}"]].to_numpy() for choice in CHOICES]
+    )
+    realized = flow[np.arange(len(flow)), codes]
+
+    delta = params.loc[("delta", "delta"), "value"]
+    num_agents = len(np.unique(get_panel_array(df, "Identifier")))
+
+    return {"lifetime_utility": np.sum(delta ** period * realized) / num_agents}
+
+
+# Each quantity of interest reduces a simulated panel to a dictionary of named statistics, so
+# that all of them are computed from a single simulation.
+QUANTITIES = {
+    "avg_schooling": reduce_average_schooling,
+    "occupation_shares": reduce_occupation_shares,
+    "mean_log_wage": reduce_mean_log_wage,
+    "lifetime_utility": reduce_lifetime_utility,
+}
+
+
+def transform_params_kw94_respy(kw94_params, spec="kw_94_one"):
 
     assert len(kw94_params) == 26, "Length of KW94 vector must be 26."
 
-    params, _ = rp.get_example_model("kw_94_one", with_data=False)
+    # The parameters that are not part of KW94 are taken from the same specification.
+    params, _ = get_example_model(spec)
 
-    rp_params = pd.Series(
-        data=np.full(len(params["value"].values), np.nan), index=params.index
+    rp_params = transform_params_kw94_respy_batch(
+        kw94_params.values, kw94_params.index, params
     )
 
+    return pd.Series(data=rp_params[0], index=params.index)
+
+
+def transform_params_kw94_respy_batch(kw94_samples, kw94_index, params=None, as_frame=False):
+    """Transform a whole batch of KW94 parameter vectors to respy parameters at once.
+
+    The samples are an array of shape (N, 26) whose columns are ordered as in kw94_index. The
+    result is an array of shape (N, n_respy_params) ordered as the respy parameters, or a wide
+    DataFrame with the respy index as columns if requested.
+    """
+    kw94_samples = np.atleast_2d(np.asarray(kw94_samples, dtype=float))
+    assert kw94_samples.shape[1] == 26, "Length of KW94 vector must be 26."
+
+    if params is None:
+        params, _ = get_example_model("kw_94_one")
+
+    num_draws = kw94_samples.shape[0]
+    kw94_pos = {name: i for i, name in enumerate(kw94_index)}
+    rp_pos = {name: i for i, name in enumerate(params.index)}
+
+    rp_params = np.full((num_draws, len(params.index)), np.nan)
+
     # Copy values that are not in KW94 from respy paramters.
-    rp_params[("delta", "delta")] = params.loc[("delta", "delta"), "value"]
-    rp_params[("meas_error", "sd_a")] = params.loc[("meas_error", "sd_a"), "value"]
-    rp_params[("meas_error", "sd_b")] = params.loc[("meas_error", "sd_b"), "value"]
-    rp_params[("lagged_choice_1_edu", "edu_ten")] = params.loc[
-        ("lagged_choice_1_edu", "edu_ten"), "value"
-    ]
-    rp_params[("initial_exp_edu", "10")] = params.loc[
-        ("initial_exp_edu", "10"), "value"
-    ]
-    rp_params[("maximum_exp", "edu")] = params.loc[("maximum_exp", "edu"), "value"]
-
-    # Set values that are transformed with *(-1) by respy
-    # square experiences alphas
-    rp_params[("wage_a", "exp_a_square")] = -kw94_params["alpha13"]
-    rp_params[("wage_a", "exp_b_square")] = -kw94_params["alpha15"]
-    rp_params[("wage_b", "exp_b_square")] = -kw94_params["alpha23"]
-    rp_params[("wage_b", "exp_a_square")] = -kw94_params["alpha25"]
-    # betas
-    rp_params[("nonpec_edu", "at_least_twelve_exp_edu")] = -kw94_params["beta1"]
-    rp_params[("nonpec_edu", "not_edu_last_period")] = -kw94_params["beta2"]
-
-    # Set SDs and Corrs that are Cholesky elements in KW94.
-    chol = np.zeros((4, 4))
-    np.fill_diagonal(chol, kw94_params[["a11", "a22", "a33", "a44"]])
-    chol[1, 0] = kw94_params["a21"]
-    chol[2, :2] = [kw94_params["a31"], kw94_params["a32"]]
-    chol[3, :3] = [kw94_params["a41"], kw94_params["a42"], kw94_params["a43"]]
-
-    cov = np.matmul(chol, chol.T)
-    sd = np.sqrt(np.diag(cov))
-
-    rp_params[("shocks_sdcorr", "sd_a")] = sd[0]
-    rp_params[("shocks_sdcorr", "sd_b")] = sd[1]
-    rp_params[("shocks_sdcorr", "sd_edu")] = sd[2]
-    rp_params[("shocks_sdcorr", "sd_home")] = sd[3]
-    rp_params[("shocks_sdcorr", "corr_b_a")] = cov[1, 0] / (sd[1] * sd[0])
-    rp_params[("shocks_sdcorr", "corr_edu_a")] = cov[2, 0] / (sd[2] * sd[0])
-    rp_params[("shocks_sdcorr", "corr_edu_b")] = cov[2, 1] / (sd[2] * sd[1])
-    rp_params[("shocks_sdcorr", "corr_home_a")] = cov[3, 0] / (sd[3] * sd[0])
-    rp_params[("shocks_sdcorr", "corr_home_b")] = cov[3, 1] / (sd[3] * sd[1])
-    rp_params[("shocks_sdcorr", "corr_home_edu")] = cov[3, 2] / (sd[3] * sd[2])
-
-    # Fill in KW94 paramters that are not transformed.
-    # alphas
-    rp_params[("wage_a", "constant")] = kw94_params["alpha10"]
-    rp_params[("wage_a", "exp_edu")] = kw94_params["alpha11"]
-    rp_params[("wage_a", "exp_a")] = kw94_params["alpha12"]
-    rp_params[("wage_a", "exp_b")] = kw94_params["alpha14"]
+    for name in KW94_FIXED:
+        rp_params[:, rp_pos[name]] = params.loc[name, "value"]
 
-    rp_params[("wage_b", "constant")] = kw94_params["alpha20"]
-    rp_params[("wage_b", "exp_edu")] = kw94_params["alpha21"]
-    # second number behind alpha switched compared to above
-    rp_params[("wage_b", "exp_a")] = kw94_params["alpha24"]
-    rp_params[("wage_b", "exp_b")] = kw94_params["alpha22"]
+    # Fill in KW94 paramters that are mapped directly, some of them are transformed with *(-1)
+    # by respy.
+    for name, kw94_name, sign in KW94_DIRECT:
+        rp_params[:, rp_pos[name]] = sign * kw94_samples[:, kw94_pos[kw94_name]]
 
-    # betas
-    rp_params[("nonpec_edu", "constant")] = kw94_params["beta0"]
+    # Set SDs and Corrs that are Cholesky elements in KW94. We stack the lower-triangular
+    # matrices of all draws and compute their covariance matrices in one go.
+    rows, cols = np.tril_indices(4)
+    chol = np.zeros((num_draws, 4, 4))
+    chol[:, rows, cols] = kw94_samples[:, [kw94_pos[name] for name in KW94_CHOLESKY]]
 
-    # gamma
-    rp_params[("nonpec_home", "constant")] = kw94_params["gamma0"]
+    cov = np.einsum("nij,nkj->nik", chol, chol)
+    sd = np.sqrt(np.einsum("nii->ni", cov))
+    corr = cov / (sd[:, :, None] * sd[:, None, :])
+
+    for i, label in enumerate(SHOCK_LABELS):
+        rp_params[:, rp_pos[("shocks_sdcorr", f"sd_{label}")]] = sd[:, i]
+
+    rows, cols = np.tril_indices(4, k=-1)
+    for i, j in zip(rows, cols):
+        name = ("shocks_sdcorr", f"corr_{SHOCK_LABELS[i]}_{SHOCK_LABELS[j]}")
+        rp_params[:, rp_pos[name]] = corr[:, i, j]
+
+    if as_frame:
+        rp_params = pd.DataFrame(rp_params, columns=params.index)
 
     return rp_params
@@ -0,0 +1,92 @@
+"""This module contains the persistent cache of model evaluations.
+
+Each entry is addressed by a hash of the KW94 parameter vector, the respy options, the tuition
+subsidy, and the requested quantities. The values are stored as JSON. The cache lives in a local
+SQLite database that is shared by all worker processes. Once it exceeds its maximum size, the
+least recently used entries are evicted.
+"""
+import sqlite3
+import hashlib
+import json
+import time
+
+import numpy as np
+
+# We account for the key and the access time of each entry on top of the length of its value,
+# which ranges from a single number to the shares of all occupations in all periods.
+ENTRY_OVERHEAD = 64 + 8
+
+DEFAULT_MAX_SIZE = 100 * 1024 ** 2
+
+
+def open_cache(fname, max_size=DEFAULT_MAX_SIZE):
+    """Open the cache, which needs to be done separately in each process."""
+    connection = sqlite3.connect(str(fname), timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS evaluations "
+        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS lru ON evaluations (accessed)")
+    connection.commit()
+
+    return {"connection": connection, "max_size": max_size}
+
+
+def get_cache_key(sample, options, tuition_subsidy, quantities=("avg_schooling",),
+                  model="kw_94_one"):
+    """Compute the content address of an evaluation."""
+    hasher = hashlib.sha256()
+    hasher.update(np.asarray(sample, dtype=np.float64).tobytes())
+    hasher.update(json.dumps(options, sort_keys=True, default=str).encode())
+    hasher.update(json.dumps([float(tuition_subsidy), list(quantities), model]).encode())
+
+    return hasher.hexdigest()
+
+
+def read_cache(cache, key):
+    """Look up an evaluation and return None if it is not available."""
+    connection = cache["connection"]
+
+    row = connection.execute("SELECT value FROM evaluations WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+
+    with connection:
+        connection.execute(
+            "UPDATE evaluations SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+
+    return json.loads(row[0])
+
+
+def write_cache(cache, key, value):
+    """Store an evaluation and evict the least recently used entries if necessary."""
+    connection = cache["connection"]
+
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time()),
+        )
+
+        size = connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(value)), 0) + COUNT(*) * ? FROM evaluations",
+            (ENTRY_OVERHEAD,),
+        ).fetchone()[0]
+
+        # We walk through the entries from the least recently used one and evict them until the
+        # cache is back under its maximum size. The new entry is always kept.
+        if size > cache["max_size"]:
+            rows = connection.execute(
+                "SELECT key, LENGTH(value) FROM evaluations WHERE key != ? ORDER BY accessed",
+                (key,),
+            )
+            evicted = list()
+            for evicted_key, length in rows:
+                if size <= cache["max_size"]:
+                    break
+                evicted.append((evicted_key,))
+                size -= length + ENTRY_OVERHEAD
+
+            connection.executemany("DELETE FROM evaluations WHERE key = ?", evicted)
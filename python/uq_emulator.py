@@ -0,0 +1,147 @@
+"""This module contains the Gaussian process emulator of the quantity of interest.
+
+The emulator is set up on the standardized input space like the polynomial chaos surrogate. It
+uses a constant mean and a squared exponential kernel with a separate length scale for each
+parameter, so that irrelevant parameters are switched off by long length scales. The design is
+built up sequentially at the points where the emulator is most uncertain.
+"""
+from scipy.linalg import cho_factor
+from scipy.linalg import cho_solve
+from scipy.optimize import minimize
+import numpy as np
+
+# We bound the log hyperparameters to keep the kernel matrix well-conditioned.
+BOUNDS_LENGTHSCALE = (np.log(0.05), np.log(100.0))
+BOUNDS_SIGNAL = (np.log(1e-4), np.log(1e2))
+BOUNDS_NOISE = (np.log(1e-8), np.log(1.0))
+
+# The candidates of the active-learning design are spread wider than the input distribution,
+# so that the density weighting decides how far into the tails the design reaches.
+CANDIDATE_SCALE = 1.5
+
+
+def get_kernel(z1, z2, lengthscales, signal):
+    """Evaluate the squared exponential kernel between two sets of standardized points."""
+    diff = (z1[:, None, :] - z2[None, :, :]) / lengthscales
+
+    return signal * np.exp(-0.5 * np.sum(diff ** 2, axis=2))
+
+
+def get_negative_log_likelihood(theta, z, y):
+    """Evaluate the negative log marginal likelihood and its gradient.
+
+    The hyperparameters are the log length scales, the log signal variance, and the log noise
+    variance. The noise captures the simulation noise of the model.
+    """
+    dim = z.shape[1]
+    lengthscales, signal, noise = np.exp(theta[:dim]), np.exp(theta[dim]), np.exp(theta[dim + 1])
+
+    kernel = get_kernel(z, z, lengthscales, signal)
+    try:
+        chol = cho_factor(kernel + noise * np.eye(len(y)), lower=True)
+    except np.linalg.LinAlgError:
+        return np.inf, np.zeros_like(theta)
+
+    alpha = cho_solve(chol, y)
+    value = 0.5 * y @ alpha + np.sum(np.log(np.diag(chol[0]))) + 0.5 * len(y) * np.log(2 * np.pi)
+
+    # The gradient with respect to each hyperparameter is half the trace of the product of
+    # this matrix and the derivative of the covariance matrix.
+    inner = cho_solve(chol, np.eye(len(y))) - np.outer(alpha, alpha)
+
+    gradient = np.empty_like(theta)
+    for d in range(dim):
+        sq_dist = (z[:, None, d] - z[None, :, d]) ** 2 / lengthscales[d] ** 2
+        gradient[d] = 0.5 * np.sum(inner * kernel * sq_dist)
+    gradient[dim] = 0.5 * np.sum(inner * kernel)
+    gradient[dim + 1] = 0.5 * noise * np.trace(inner)
+
+    return value, gradient
+
+
+def fit_emulator(z, evals, theta=None):
+    """Fit the emulator to evaluations at standardized points.
+
+    The hyperparameters are estimated by maximum likelihood, starting from earlier estimates if
+    available. The evaluations are standardized before, so the defaults are reasonable.
+    """
+    z, evals = np.atleast_2d(z), np.asarray(evals, dtype=float)
+    dim = z.shape[1]
+
+    y_mean, y_sd = evals.mean(), evals.std()
+    y_sd = y_sd if y_sd > 0 else 1.0
+    y = (evals - y_mean) / y_sd
+
+    if theta is None:
+        theta = np.concatenate((np.full(dim, np.log(np.sqrt(dim))), [0.0, np.log(1e-2)]))
+
+    bounds = [BOUNDS_LENGTHSCALE] * dim + [BOUNDS_SIGNAL, BOUNDS_NOISE]
+    rslt = minimize(get_negative_log_likelihood, theta, args=(z, y), jac=True,
+                    method="L-BFGS-B", bounds=bounds)
+
+    return get_emulator(z, y, rslt.x, y_mean, y_sd)
+
+
+def get_emulator(z, y, theta, y_mean, y_sd):
+    """Condition the emulator on standardized evaluations for given hyperparameters."""
+    dim = z.shape[1]
+    lengthscales, signal, noise = np.exp(theta[:dim]), np.exp(theta[dim]), np.exp(theta[dim + 1])
+
+    kernel = get_kernel(z, z, lengthscales, signal) + noise * np.eye(len(y))
+    chol = cho_factor(kernel, lower=True)
+
+    emulator = {
+        "z": z,
+        "y": y,
+        "theta": theta,
+        "lengthscales": lengthscales,
+        "signal": signal,
+        "noise": noise,
+        "chol": chol,
+        "alpha": cho_solve(chol, y),
+        "y_mean": y_mean,
+        "y_sd": y_sd,
+    }
+
+    return emulator
+
+
+def predict_emulator(emulator, z):
+    """Predict the mean and variance of the quantity at standardized points.
+
+    The variance is that of the latent function and thus excludes the simulation noise.
+    """
+    z = np.atleast_2d(z)
+
+    cross = get_kernel(z, emulator["z"], emulator["lengthscales"], emulator["signal"])
+
+    mean = cross @ emulator["alpha"]
+    variance = emulator["signal"] - np.sum(cross * cho_solve(emulator["chol"], cross.T).T, axis=1)
+    variance = np.maximum(variance, 0.0)
+
+    return emulator["y_mean"] + emulator["y_sd"] * mean, emulator["y_sd"] ** 2 * variance
+
+
+def get_active_batch(emulator, candidates, batch_size):
+    """Select the candidates with the largest predictive variance weighted by input density.
+
+    The candidates are standardized points. After each selection, we condition the emulator on
+    the selected point. As the predictive variance does not depend on the evaluations, this
+    spreads the batch out before any of its points is evaluated.
+    """
+    log_density = -0.5 * np.sum(candidates ** 2, axis=1)
+    weights = np.exp(log_density - log_density.max())
+
+    z, y, selected = emulator["z"], emulator["y"], list()
+    for _ in range(batch_size):
+        _, variance = predict_emulator(emulator, candidates)
+        score = variance * weights
+        score[selected] = -np.inf
+
+        selected.append(int(np.argmax(score)))
+
+        # The value of the pseudo-observation does not matter for the variance.
+        z, y = np.vstack((z, candidates[selected[-1]])), np.append(y, 0.0)
+        emulator = get_emulator(z, y, emulator["theta"], emulator["y_mean"], emulator["y_sd"])
+
+    return np.array(selected)
@@ -0,0 +1,124 @@
+"""This module contains the executor backends that distribute model evaluations.
+
+All backends offer the same interface of an imap_unordered() function, which takes the function
+to evaluate, the tasks, and the number of tasks handed to a worker at once. The results are
+returned as they arrive.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from functools import partial
+import multiprocessing as mp
+import importlib.util
+
+# The dask backend is optional as dask is not part of our environment, so we only offer it if
+# its distributed scheduler is installed.
+BACKENDS = ["multiprocessing", "futures", "serial"]
+if importlib.util.find_spec("distributed") is not None:
+    BACKENDS.append("dask")
+
+# The futures and dask backends do not run an initializer when their workers start, so each
+# worker process runs it lazily before its first chunk of tasks.
+IS_INITIALIZED = False
+
+
+@contextmanager
+def get_executor(backend, num_procs, initializer=None, initargs=()):
+    """Start the workers of the backend and yield its imap_unordered() function."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend {backend} not available, use one of {BACKENDS}.")
+
+    if backend == "multiprocessing":
+        with mp.Pool(num_procs, initializer=initializer, initargs=initargs) as pool:
+            yield partial(imap_unordered_multiprocessing, pool)
+
+    elif backend == "futures":
+        with ProcessPoolExecutor(num_procs) as executor:
+            yield partial(imap_unordered_futures, executor, initializer, initargs)
+
+    elif backend == "serial":
+        if initializer is not None:
+            initializer(*initargs)
+        yield imap_unordered_serial
+
+    else:
+        # We only need dask for this backend, which runs a cluster on the local machine with
+        # one single-threaded process per worker.
+        from dask.distributed import LocalCluster
+        from dask.distributed import Client
+
+        cluster = LocalCluster(n_workers=num_procs, threads_per_worker=1, processes=True)
+        try:
+            with Client(cluster) as client:
+                yield partial(imap_unordered_dask, client, initializer, initargs)
+        finally:
+            cluster.close()
+
+
+def imap_unordered_multiprocessing(pool, func, tasks, chunk_size=1):
+
+    return pool.imap_unordered(func, tasks, chunk_size)
+
+
+def imap_unordered_futures(executor, initializer, initargs, func, tasks, chunk_size=1):
+
+    futures = [
+        executor.submit(run_chunk, initializer, initargs, func, chunk)
+        for chunk in get_chunks(tasks, chunk_size)
+    ]
+    for future in as_completed(futures):
+        yield from future.result()
+
+
+def imap_unordered_serial(func, tasks, chunk_size=1):
+
+    for task in tasks:
+        yield func(task)
+
+
+def imap_unordered_dask(client, initializer, initargs, func, tasks, chunk_size=1):
+
+    from dask.distributed import as_completed as dask_as_completed
+
+    futures = [
+        client.submit(run_chunk, initializer, initargs, func, chunk, pure=False)
+        for chunk in get_chunks(tasks, chunk_size)
+    ]
+    for future in dask_as_completed(futures):
+        yield from future.result()
+
+
+def map_ordered(imap_unordered, func, tasks, chunk_size=1):
+    """Evaluate all tasks with any of the backends and return the results in order."""
+    tasks = list(tasks)
+
+    rslt = [None] * len(tasks)
+    for i, value in imap_unordered(partial(call_indexed, func), enumerate(tasks), chunk_size):
+        rslt[i] = value
+
+    return rslt
+
+
+def call_indexed(func, task):
+    """Evaluate a task that comes with its position."""
+    i, task = task
+
+    return i, func(task)
+
+
+def run_chunk(initializer, initargs, func, chunk):
+    """Evaluate a chunk of tasks in a worker and initialize the worker first if required."""
+    global IS_INITIALIZED
+
+    if initializer is not None and not IS_INITIALIZED:
+        initializer(*initargs)
+        IS_INITIALIZED = True
+
+    return [func(task) for task in chunk]
+
+
+def get_chunks(tasks, chunk_size):
+
+    tasks = list(tasks)
+
+    return [tasks[i : i + chunk_size] for i in range(0, len(tasks), chunk_size)]
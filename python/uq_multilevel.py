@@ -0,0 +1,106 @@
+"""This module contains the multilevel Monte Carlo estimator of the quantity of interest.
+
+The levels are increasingly accurate and expensive versions of the model, with the last one
+at full fidelity. The expectation at the finest level is written as the expectation at the
+coarsest level plus the expected differences between consecutive levels. Both models of a
+difference are evaluated at the same draw, so the differences have a small variance and only
+require few of the expensive evaluations.
+"""
+import time
+
+import numpy as np
+
+from uq_auxiliary import get_quantities_of_interest
+from uq_auxiliary import get_worker_spec
+from uq_auxiliary import WORKER_CACHE
+from uq_auxiliary import init_worker
+from uq_cache import get_cache_key
+from uq_cache import read_cache
+
+
+def get_level_options(num_agents, interpolation_points=None):
+    """Set up the respy options of each level from the number of agents and interpolation points.
+
+    Without interpolation points, all levels use the exact solution of the model.
+    """
+    if interpolation_points is None:
+        interpolation_points = [-1] * len(num_agents)
+    assert len(num_agents) == len(interpolation_points), "Levels need to be of equal length."
+
+    return [
+        {"simulation_agents": int(agents), "interpolation_points": int(points)}
+        for agents, points in zip(num_agents, interpolation_points)
+    ]
+
+
+def get_level_difference(task):
+    """Evaluate the difference between a level and the next coarser one at the same draw.
+
+    The task is a tuple of key, sample, and the options of both levels, where the coarser one
+    is None for the coarsest level. We also return the time spent, which is the cost of one
+    sample of the level. The simulate functions of both levels are set up before we start the
+    clock, as this is done only once per worker and would otherwise dominate the pilot draws.
+    If any of the evaluations is found in the cache, the time says nothing about the cost and we
+    return None instead.
+    """
+    key, sample, spec, tuition_subsidy, fine, coarse = task
+
+    if not WORKER_CACHE:
+        init_worker()
+    setups = [get_worker_spec(spec, options) for options in [fine, coarse] if options is not None]
+
+    is_cached = False
+    if WORKER_CACHE["cache"] is not None:
+        for setup in setups:
+            key_cache = get_cache_key(sample, setup["base_options"], tuition_subsidy,
+                                      ["avg_schooling"], spec)
+            is_cached |= read_cache(WORKER_CACHE["cache"], key_cache) is not None
+
+    start = time.perf_counter()
+
+    values = list()
+    for options in [fine, coarse]:
+        if options is None:
+            values.append(0.0)
+            continue
+        rslt = get_quantities_of_interest(sample, [tuition_subsidy], ["avg_schooling"], spec,
+                                          options)
+        values.append(rslt[("avg_schooling", float(tuition_subsidy))])
+
+    cost = None if is_cached else time.perf_counter() - start
+
+    return key, (values[0] - values[1], cost)
+
+
+def get_level_costs(costs):
+    """Average the measured costs of each level.
+
+    A level whose samples were all found in the cache has no measured cost, and we then assume
+    the largest cost of the other levels to be on the safe side.
+    """
+    level_costs = np.array([np.mean(values) if values else np.nan for values in costs])
+    if np.all(np.isnan(level_costs)):
+        return np.ones(len(costs))
+
+    return np.where(np.isnan(level_costs), np.nanmax(level_costs), level_costs)
+
+
+def get_optimal_allocation(variances, costs, target_se):
+    """Determine the number of samples of each level that reach the standard error at least cost.
+
+    The number of samples of a level is proportional to the square root of its variance over
+    its cost, as derived by Giles (2008).
+    """
+    variances, costs = np.asarray(variances, dtype=float), np.asarray(costs, dtype=float)
+
+    num_draws = np.sqrt(variances / costs) * np.sum(np.sqrt(variances * costs)) / target_se ** 2
+
+    return np.ceil(num_draws).astype(int)
+
+
+def get_multilevel_estimate(differences):
+    """Combine the differences of all levels into the estimate and its standard error."""
+    mean = sum(np.mean(values) for values in differences)
+    variance = sum(np.var(values, ddof=1) / len(values) for values in differences)
+
+    return mean, np.sqrt(variance)
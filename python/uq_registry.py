@@ -0,0 +1,58 @@
+"""This module contains the registry of example models and input tables.
+
+Each example model and input table is loaded only once per process and then handed out as a
+copy, so that callers are free to modify what they receive. We import respy only once a model
+is actually requested, as it is by far the most expensive import of the project.
+"""
+import copy
+
+import pandas as pd
+
+from uq_configurations import INPUT_DIR
+
+# Starting with pandas 3, shallow copies are copy-on-write. The data is then only duplicated
+# once a caller modifies its handout, and otherwise we need to copy right away.
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+MODELS = dict()
+
+TABLES = dict()
+
+
+def get_example_model(name="kw_94_one"):
+    """Get the parameters and options of one of the respy example models."""
+    if name not in MODELS:
+        import respy as rp
+
+        MODELS[name] = rp.get_example_model(name, with_data=False)
+
+    params, options = MODELS[name]
+
+    return params.copy(deep=not COPY_ON_WRITE), copy.deepcopy(options)
+
+
+def get_simulate_func(params, options):
+    """Build the respy simulate function, which creates the state space and the shocks."""
+    import respy as rp
+
+    return rp.get_simulate_func(params, options)
+
+
+def get_input_table(name="table41_kw_94"):
+    """Get one of the tables from the input directory or any other table given by its path."""
+    if name not in TABLES:
+        fname = name if name.endswith(".csv") else f"{INPUT_DIR}/{name}.csv"
+        TABLES[name] = pd.read_csv(fname, sep=",")
+
+    return TABLES[name].copy(deep=not COPY_ON_WRITE)
+
+
+def get_kw94_index():
+    """Get the names of the KW94 parameters in the order of Table 4.1."""
+    return get_input_table()["parameter"].values
+
+
+def clear_registry():
+    """Forget all models and tables, for example after the input files changed."""
+    MODELS.clear()
+    TABLES.clear()
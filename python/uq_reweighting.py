@@ -0,0 +1,122 @@
+"""This module contains the importance-sampling reweighting of existing Monte Carlo runs.
+
+The draws of a run are reused for a new input distribution by weighting each of them with the
+likelihood ratio of the target and the sampling distribution. All input distributions are
+independent normal distributions as specified by the means and standard deviations of the input
+tables.
+"""
+import numpy as np
+
+
+def get_log_density(samples, mean, sd):
+    """Evaluate the log density of the independent normal inputs for each draw.
+
+    Some of the standard deviations in the input tables are negative, so we only use their
+    magnitude as is done when the draws are created.
+    """
+    sd = np.abs(sd)
+    z = (np.atleast_2d(samples) - mean) / sd
+
+    return -0.5 * np.sum(z ** 2, axis=1) - np.sum(np.log(sd)) - 0.5 * len(sd) * np.log(2 * np.pi)
+
+
+def get_mixture_log_density(samples, components, counts):
+    """Evaluate the log density of the mixture of several sampling distributions.
+
+    Each component is a pair of means and standard deviations and is weighted by the number of
+    draws taken from it. Treating all draws as coming from this mixture is the balance heuristic
+    of multiple importance sampling.
+    """
+    shares = np.asarray(counts, dtype=float) / np.sum(counts)
+
+    log_densities = [
+        np.log(share) + get_log_density(samples, mean, sd)
+        for (mean, sd), share in zip(components, shares)
+        if share > 0
+    ]
+
+    return np.logaddexp.reduce(log_densities, axis=0)
+
+
+def get_importance_weights(log_target, log_proposal):
+    """Compute the self-normalized weights from the log densities of the draws.
+
+    We subtract the largest log ratio before exponentiating, as the densities of the 26
+    parameters easily under- or overflow.
+    """
+    log_ratio = np.asarray(log_target) - np.asarray(log_proposal)
+    weights = np.exp(log_ratio - log_ratio.max())
+
+    return weights / weights.sum()
+
+
+def get_effective_sample_size(weights):
+    """Compute Kish's effective sample size of normalized weights."""
+    return 1.0 / np.sum(np.asarray(weights) ** 2)
+
+
+def get_num_fallback_draws(samples, components, min_ess, sample_target, max_draws):
+    """Determine the new draws from the target that lift the ESS of the mixture to its minimum.
+
+    The old draws lose weight once all draws are treated as coming from the mixture, so each
+    new draw contributes less than one to the effective sample size. As the weights only depend
+    on the inputs, we draw candidates without evaluating the model and double their number,
+    starting from the shortfall, until the minimum or the maximum number of draws is reached.
+    The sample_target function returns a given number of draws from the target.
+    """
+    log_target = get_log_density(samples, *components[1])
+    ess = get_effective_sample_size(
+        get_importance_weights(log_target, get_log_density(samples, *components[0]))
+    )
+
+    num_new = min(int(np.ceil(max(0.0, min_ess - ess))), max_draws)
+    new_samples = samples[:0]
+    while num_new > 0:
+        new_samples = sample_target(num_new)
+
+        mixture_samples = np.concatenate([samples, new_samples])
+        log_proposal = get_mixture_log_density(mixture_samples, components,
+                                               [len(samples), num_new])
+        weights = get_importance_weights(get_log_density(mixture_samples, *components[1]),
+                                         log_proposal)
+        ess = get_effective_sample_size(weights)
+
+        if ess >= min_ess or num_new == max_draws:
+            break
+        num_new = min(2 * num_new, max_draws)
+
+    return new_samples, ess
+
+
+def get_weighted_moments(evals, weights):
+    """Compute the weighted mean and standard deviation of each column of the evaluations.
+
+    The variance is corrected for the loss in degrees of freedom due to the weights.
+    """
+    evals = np.asarray(evals, dtype=float).reshape(len(weights), -1)
+
+    mean = weights @ evals
+    variance = weights @ (evals - mean) ** 2 / (1.0 - np.sum(weights ** 2))
+
+    return mean, np.sqrt(variance)
+
+
+def get_weighted_quantiles(evals, weights, quantiles):
+    """Compute weighted quantiles of each column of the evaluations.
+
+    We interpolate between the sorted evaluations, each of which is located at the midpoint of
+    its share of the cumulative weight. The result has shape (num_quantiles, num_columns).
+    """
+    evals = np.asarray(evals, dtype=float).reshape(len(weights), -1)
+
+    order = np.argsort(evals, axis=0)
+    sorted_evals = np.take_along_axis(evals, order, axis=0)
+    sorted_weights = np.asarray(weights)[order]
+    positions = np.cumsum(sorted_weights, axis=0) - 0.5 * sorted_weights
+
+    rslt = [
+        np.interp(quantiles, positions[:, j], sorted_evals[:, j])
+        for j in range(evals.shape[1])
+    ]
+
+    return np.array(rslt).T
@@ -0,0 +1,22 @@
+"""This module contains the sampling layer for the input distribution of our UQ analysis."""
+import numpy as np
+
+# The alternative rules are all provided by chaospy, which maps the design on the unit hypercube
+# through the inverse CDF of the normal distribution. Sobol and Halton are low-discrepancy
+# sequences, while Latin hypercube sampling stratifies each dimension of random draws.
+SAMPLERS = ["random", "sobol", "halton", "latin_hypercube"]
+
+
+def get_samples(distribution, num_draws, sampler="random"):
+    """Draw all points of evaluation at once.
+
+    The result is an array of shape (num_draws, dim) so that each row is one parameter vector.
+    The random and Latin hypercube samplers depend on the state of the NumPy random number
+    generator, while the Sobol and Halton designs are deterministic.
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Sampler {sampler} not available, use one of {SAMPLERS}.")
+
+    samples = distribution.sample(num_draws, rule=sampler)
+
+    return np.atleast_2d(samples).T.reshape(num_draws, -1)
@@ -0,0 +1,83 @@
+"""This module contains the elementary-effects screening of the input parameters.
+
+We follow Morris (1991) with the absolute mean of the effects by Campolongo et al. (2007). The
+trajectories are set up on a grid of levels in the unit hypercube, and each level is mapped to
+the center of its share of probability under the standard normal distribution. The effects are
+measured on the unit scale, so that they are comparable across parameters.
+"""
+from scipy.stats import norm
+import pandas as pd
+import numpy as np
+
+
+def get_morris_trajectories(dim, num_trajectories, num_levels=4):
+    """Create the trajectories of dim + 1 points, where each step changes a single parameter.
+
+    The result has shape (num_trajectories, dim + 1, dim) and depends on the state of the NumPy
+    random number generator.
+    """
+    assert num_levels % 2 == 0, "The number of levels needs to be even."
+    delta = num_levels / (2 * (num_levels - 1))
+
+    steps = np.tril(np.ones((dim + 1, dim)), -1)
+
+    trajectories = np.empty((num_trajectories, dim + 1, dim))
+    for r in range(num_trajectories):
+        base = np.random.randint(num_levels // 2, size=dim) / (num_levels - 1)
+        signs = np.random.choice([-1.0, 1.0], size=dim)
+        order = np.random.permutation(dim)
+
+        points = base + 0.5 * delta * ((2 * steps - 1) * signs + 1)
+        trajectories[r] = points[:, order]
+
+    return trajectories
+
+
+def get_standardized_points(trajectories, num_levels=4):
+    """Map the points of the trajectories to the standardized input space."""
+    unit = (trajectories * (num_levels - 1) + 0.5) / num_levels
+
+    return norm.ppf(unit)
+
+
+def get_elementary_effects(evals, trajectories):
+    """Compute the elementary effects of all parameters along each trajectory.
+
+    The evaluations are ordered as the points of the trajectories. The result has shape
+    (num_trajectories, dim) with the columns ordered as the parameters.
+    """
+    num_trajectories, num_points, dim = trajectories.shape
+    evals = np.asarray(evals, dtype=float).reshape(num_trajectories, num_points)
+
+    steps = np.diff(trajectories, axis=1)
+    changed = np.argmax(np.abs(steps), axis=2)
+    delta = np.take_along_axis(steps, changed[:, :, None], axis=2)[:, :, 0]
+
+    effects = np.empty((num_trajectories, dim))
+    np.put_along_axis(effects, changed, np.diff(evals, axis=1) / delta, axis=1)
+
+    return effects
+
+
+def get_morris_indices(effects, index):
+    """Summarize the elementary effects of each parameter."""
+    rslt = pd.DataFrame(index=pd.Index(index, name="parameter"))
+    rslt["mu"] = effects.mean(axis=0)
+    rslt["mu_star"] = np.abs(effects).mean(axis=0)
+    rslt["sigma"] = effects.std(axis=0, ddof=1)
+
+    return rslt
+
+
+def get_reduced_table(table, indices, threshold=0.1):
+    """Fix the unimportant parameters of an input table at their means.
+
+    A parameter is unimportant if its absolute mean effect is below the threshold relative to
+    the largest one. Fixed parameters have a standard deviation of zero.
+    """
+    table = table.copy()
+
+    is_fixed = indices["mu_star"].values < threshold * indices["mu_star"].max()
+    table.loc[is_fixed, "sd"] = 0.0
+
+    return table
@@ -0,0 +1,78 @@
+"""This module contains the variance-based sensitivity analysis of the quantity of interest."""
+import pandas as pd
+import numpy as np
+
+from uq_sampling import get_samples
+
+
+def get_saltelli_design(mean, sd, num_draws, sampler="sobol"):
+    """Create the design for the estimation of first-order and total Sobol indices.
+
+    The design stacks the blocks A, B, and AB_1, ..., AB_d on top of each other, where AB_i is
+    A with its i-th column taken from B. It thus has num_draws * (dim + 2) rows. A and B are the
+    two halves of a single draw in 2 * dim dimensions from the standardized input space.
+    """
+    import chaospy as cp
+
+    dim = len(mean)
+
+    distribution = cp.Iid(cp.Normal(0, 1), 2 * dim)
+    samples = mean + get_samples(distribution, num_draws, sampler).reshape(-1, 2, dim) * sd
+    a, b = samples[:, 0], samples[:, 1]
+
+    blocks = [a, b]
+    for i in range(dim):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+
+    return np.concatenate(blocks)
+
+
+def get_unique_design(design):
+    """Remove duplicate rows from the design so that each point is only evaluated once.
+
+    Duplicates arise for example if parameters are fixed in the input distribution. The inverse
+    maps the evaluations of the unique points back to the full design.
+    """
+    unique, inverse = np.unique(design, axis=0, return_inverse=True)
+
+    return unique, inverse.reshape(-1)
+
+
+def get_sobol_indices(evals, index, num_bootstrap=1000, alpha=0.05, seed=123):
+    """Estimate first-order and total Sobol indices with bootstrap confidence intervals.
+
+    We use the estimator by Saltelli et al. (2010) for the first-order and the one by Jansen
+    (1999) for the total indices. The evaluations are ordered as in the Saltelli design.
+    """
+    dim = len(index)
+    evals = np.asarray(evals, dtype=float).reshape(dim + 2, -1)
+    num_draws = evals.shape[1]
+
+    # All bootstrap replicates are drawn at once as a matrix of indices, where the first row
+    # is the original sample.
+    np.random.seed(seed)
+    resamples = np.random.randint(num_draws, size=(num_bootstrap + 1, num_draws))
+    resamples[0] = np.arange(num_draws)
+
+    f_a, f_b = evals[0][resamples], evals[1][resamples]
+    variance = np.var(np.concatenate((f_a, f_b), axis=1), axis=1)
+
+    # We center the evaluations of B for the first-order indices. This does not change their
+    # expectation but removes the noise that is otherwise proportional to the mean effect.
+    f_b_centered = f_b - np.mean(np.concatenate((f_a, f_b), axis=1), axis=1, keepdims=True)
+
+    first, total = np.empty((dim, num_bootstrap + 1)), np.empty((dim, num_bootstrap + 1))
+    for i in range(dim):
+        f_ab = evals[i + 2][resamples]
+        first[i] = np.mean(f_b_centered * (f_ab - f_a), axis=1) / variance
+        total[i] = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+
+    rslt = pd.DataFrame(index=pd.Index(index, name="parameter"))
+    for label, values in [("first", first), ("total", total)]:
+        rslt[label] = values[:, 0]
+        rslt[f"{label}_lower"] = np.quantile(values[:, 1:], alpha / 2, axis=1)
+        rslt[f"{label}_upper"] = np.quantile(values[:, 1:], 1 - alpha / 2, axis=1)
+
+    return rslt
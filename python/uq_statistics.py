@@ -0,0 +1,165 @@
+"""This module contains the statistics we compute on the results of our Monte Carlo runs."""
+import numpy as np
+
+# We process the bootstrap resamples in blocks of about this many indices.
+BLOCK_SIZE = 10000000
+
+
+def get_streaming_moments(dim):
+    """Set up the running mean and sum of squared deviations for Welford's algorithm."""
+    return {"count": 0, "mean": np.zeros(dim), "m2": np.zeros(dim)}
+
+
+def update_streaming_moments(moments, value):
+    """Update the moments with a single new result in a numerically stable way."""
+    value = np.asarray(value, dtype=float)
+
+    moments["count"] += 1
+    delta = value - moments["mean"]
+    moments["mean"] += delta / moments["count"]
+    moments["m2"] += delta * (value - moments["mean"])
+
+
+def get_standard_error(moments):
+    """Compute the standard error of the mean from the streaming moments."""
+    if moments["count"] < 2:
+        return np.full(moments["mean"].shape, np.inf)
+
+    variance = moments["m2"] / (moments["count"] - 1)
+
+    return np.sqrt(variance / moments["count"])
+
+
+def get_target_standard_error(target_se=None, target_width=None, alpha=0.05):
+    """Translate the target precision into a standard error.
+
+    The width refers to the full length of the normal-approximation confidence interval at
+    level 1 - alpha.
+    """
+    if target_width is not None:
+        from scipy.stats import norm
+
+        return target_width / (2 * norm.ppf(1 - alpha / 2))
+
+    return target_se
+
+
+def get_control_variate_estimate(evals, controls):
+    """Estimate the mean with regression-adjusted control variates.
+
+    The controls are cheap functions of the draws with an expectation of zero. We regress the
+    evaluations on them, so that the intercept is the estimate of the mean. The reduction is
+    the ratio of the variances of the plain sample average and the adjusted estimate.
+    """
+    evals = np.asarray(evals, dtype=float)
+    controls = np.asarray(controls, dtype=float).reshape(len(evals), -1)
+
+    num_draws, num_controls = controls.shape
+    assert num_draws > num_controls + 1, "Too few draws for the number of controls."
+
+    design = np.column_stack((np.ones(num_draws), controls))
+    coeffs = np.linalg.lstsq(design, evals, rcond=None)[0]
+    residuals = evals - design @ coeffs
+
+    # The standard error of the intercept accounts for the sample means of the controls
+    # deviating from zero.
+    variance = residuals @ residuals / (num_draws - num_controls - 1)
+    variance *= np.linalg.pinv(design.T @ design)[0, 0]
+
+    plain_variance = np.var(evals, ddof=1) / num_draws
+    reduction = plain_variance / variance if variance > 0 else np.nan
+
+    return {
+        "mean": coeffs[0],
+        "se": np.sqrt(variance),
+        "plain_mean": np.mean(evals),
+        "plain_se": np.sqrt(plain_variance),
+        "reduction": reduction,
+    }
+
+
+def get_bootstrap_moments(values, num_bootstrap=1000, seed=123):
+    """Compute bootstrap replicates of the mean and variance of each column of the values.
+
+    The resamples are drawn as a matrix of indices, which we process in blocks of replicates to
+    limit the memory requirements. We count how often each draw appears in each resample, so
+    that the sums of all columns are a single matrix product. The results have shape
+    (num_bootstrap, num_columns).
+    """
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    num_draws, num_columns = values.shape
+
+    # We center the values, so that the variance can be computed from the sums of the values
+    # and their squares without a loss of precision.
+    center = values.mean(axis=0)
+    values = values - center
+    values = np.column_stack((values, values ** 2))
+
+    rng = np.random.default_rng(seed)
+
+    sums, squares = np.empty((2, num_bootstrap, num_columns))
+    block_size = max(1, BLOCK_SIZE // num_draws)
+    for start in range(0, num_bootstrap, block_size):
+        stop = min(start + block_size, num_bootstrap)
+        resamples = rng.integers(num_draws, size=(stop - start, num_draws))
+        resamples += num_draws * np.arange(stop - start)[:, None]
+
+        counts = np.bincount(resamples.ravel(), minlength=(stop - start) * num_draws)
+        counts = counts.reshape(stop - start, num_draws).astype(float)
+
+        sums[start:stop], squares[start:stop] = np.split(counts @ values, 2, axis=1)
+
+    mean = sums / num_draws
+    variance = (squares - num_draws * mean ** 2) / (num_draws - 1)
+
+    return center + mean, variance
+
+
+def get_bootstrap_quantiles(values, quantiles, num_bootstrap=1000, seed=123):
+    """Compute bootstrap replicates of quantiles of each column of the values.
+
+    We use the lower order statistic as the quantile. In a resample, the k-th order statistic
+    is at most the j-th smallest value if at least k + 1 of the draws fall among the j + 1
+    smallest values, which is a binomial event. This allows to draw the replicates from their
+    exact bootstrap distribution without resampling. The result has shape
+    (num_bootstrap, num_quantiles, num_columns).
+    """
+    from scipy.stats import binom
+
+    values = np.sort(np.asarray(values, dtype=float).reshape(len(values), -1), axis=0)
+    num_draws = values.shape[0]
+
+    rng = np.random.default_rng(seed)
+
+    rslt = np.empty((num_bootstrap, len(quantiles), values.shape[1]))
+    for i, k in enumerate(get_order_statistics(num_draws, quantiles)):
+        cdf = binom.sf(k, num_draws, np.arange(1, num_draws + 1) / num_draws)
+        positions = np.searchsorted(cdf, rng.random(num_bootstrap))
+        rslt[:, i] = values[np.minimum(positions, num_draws - 1)]
+
+    return rslt
+
+
+def get_bootstrap_exceedances(values, thresholds, num_bootstrap=1000, seed=123):
+    """Compute bootstrap replicates of the probabilities that each column exceeds thresholds.
+
+    The number of exceedances in a resample is binomial, so we draw it directly. The result has
+    shape (num_bootstrap, num_thresholds, num_columns).
+    """
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    num_draws = values.shape[0]
+
+    probabilities = np.mean(values[None, :, :] > np.reshape(thresholds, (-1, 1, 1)), axis=1)
+
+    rng = np.random.default_rng(seed)
+
+    counts = rng.binomial(num_draws, probabilities, size=(num_bootstrap,) + probabilities.shape)
+
+    return counts / num_draws
+
+
+def get_order_statistics(num_draws, quantiles):
+    """Determine the position of each quantile among the sorted draws."""
+    positions = np.ceil(np.asarray(quantiles) * num_draws).astype(int) - 1
+
+    return np.clip(positions, 0, num_draws - 1)
@@ -0,0 +1,112 @@
+"""This module contains the on-disk storage of our Monte Carlo results."""
+from pathlib import Path
+import shutil
+import json
+import os
+
+import pandas as pd
+import numpy as np
+
+
+def reset_chunks(chunk_dir, metadata):
+    """Start a new append-only chunk store and record the setup of the run."""
+    chunk_dir = Path(chunk_dir)
+
+    if chunk_dir.exists():
+        shutil.rmtree(chunk_dir)
+    chunk_dir.mkdir(parents=True)
+
+    with open(chunk_dir / "metadata.json", "w") as outfile:
+        json.dump(metadata, outfile)
+
+
+def resume_chunks(chunk_dir, metadata):
+    """Open an existing chunk store, which needs to belong to a run with the same setup."""
+    chunk_dir = Path(chunk_dir)
+
+    if not (chunk_dir / "metadata.json").exists():
+        reset_chunks(chunk_dir, metadata)
+        return
+
+    with open(chunk_dir / "metadata.json", "r") as infile:
+        stored = json.load(infile)
+
+    assert stored == metadata, f"Cannot resume run {stored} with setup {metadata}."
+
+
+def load_metadata(chunk_dir):
+    """Load the setup of the run that created a chunk store."""
+    with open(Path(chunk_dir) / "metadata.json", "r") as infile:
+        return json.load(infile)
+
+
+def write_chunk(chunk_dir, df):
+    """Append a chunk of results indexed by iteration to the store.
+
+    We first write to a temporary file and then rename it, so that a crash in the middle of
+    writing never leaves a corrupted chunk behind.
+    """
+    chunk_dir = Path(chunk_dir)
+
+    # We continue after the largest index, so that a gap never leads to overwriting a chunk.
+    indices = [int(fname.name[6:12]) for fname in chunk_dir.glob("chunk_*.uq.pkl")]
+    fname = chunk_dir / f"chunk_{max(indices, default=-1) + 1:06d}.uq.pkl"
+
+    df.to_pickle(chunk_dir / ".chunk.tmp")
+    os.replace(chunk_dir / ".chunk.tmp", fname)
+
+
+def load_chunks(chunk_dir):
+    """Load all results from the store sorted by iteration."""
+    chunk_dir = Path(chunk_dir)
+
+    chunks = [pd.read_pickle(fname) for fname in sorted(chunk_dir.glob("chunk_*.uq.pkl"))]
+    if not chunks:
+        return None
+
+    df = pd.concat(chunks)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+
+    return df
+
+
+def save_mc_params(dirname, params, columns):
+    """Store the parameters of all draws as a wide float64 matrix with a separate column index.
+
+    The matrix is written in column-major order, so that each parameter is contiguous on disk
+    and a single column can be read from the memory-mapped file without touching the rest.
+    """
+    dirname = Path(dirname)
+
+    np.save(dirname / "mc_params.uq.npy", np.asfortranarray(params, dtype=np.float64))
+
+    index = {"names": list(columns.names), "columns": [list(name) for name in columns]}
+    with open(dirname / "mc_params.uq.json", "w") as outfile:
+        json.dump(index, outfile)
+
+
+def load_mc_params(dirname, mmap_mode="r"):
+    """Open the parameters of all draws as a (memory-mapped) matrix and its column index.
+
+    Results from earlier runs are only available as a long-format pickle, which we need to
+    load completely and reshape.
+    """
+    dirname = Path(dirname)
+
+    if not (dirname / "mc_params.uq.npy").exists():
+        df = pd.read_pickle(dirname / "mc_params.uq.pkl")["value"]
+        columns = df.index.droplevel("iteration").unique()
+        return df.values.reshape(-1, len(columns)), columns
+
+    with open(dirname / "mc_params.uq.json", "r") as infile:
+        index = json.load(infile)
+    columns = pd.MultiIndex.from_tuples(map(tuple, index["columns"]), names=index["names"])
+
+    return np.load(dirname / "mc_params.uq.npy", mmap_mode=mmap_mode), columns
+
+
+def load_mc_param(dirname, name):
+    """Load the draws of a single parameter."""
+    params, columns = load_mc_params(dirname)
+
+    return np.array(params[:, columns.get_loc(name)])
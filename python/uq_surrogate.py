@@ -0,0 +1,200 @@
+"""This module contains the polynomial chaos surrogate of the quantity of interest.
+
+The surrogate is set up on the standardized input space, where all parameters are independent
+standard normal. The orthonormal basis then consists of products of normalized probabilists'
+Hermite polynomials, so that the mean and the variance are directly available from the
+coefficients of the expansion.
+"""
+from math import factorial
+import pickle as pkl
+import itertools
+
+import numpy as np
+
+# We evaluate the basis in blocks of points to limit the memory requirements for large
+# numbers of points.
+BLOCK_SIZE = 10000
+
+
+def fit_surrogate(samples, evals, mean, sd, order=2, num_draws=100000, seed=123):
+    """Fit the expansion to evaluated draws by point collocation.
+
+    The coefficients are determined by least squares, which requires more draws than there are
+    terms in the expansion.
+    """
+    multi_indices = get_multi_indices(len(mean), order)
+    assert len(evals) >= len(multi_indices), "Too few draws for the order of the expansion."
+
+    basis = get_basis(standardize(samples, mean, sd), multi_indices)
+    coeffs = np.linalg.lstsq(basis, evals, rcond=None)[0]
+
+    return get_surrogate(coeffs, multi_indices, mean, sd, num_draws, seed)
+
+
+def get_quadrature_design(mean, sd, order=2):
+    """Create the sparse grid for the pseudo-spectral projection in the original space."""
+    import chaospy as cp
+
+    distribution = cp.Iid(cp.Normal(0, 1), len(mean))
+    nodes, weights = cp.generate_quadrature(order, distribution, rule="gaussian", sparse=True)
+
+    return mean + nodes.T * sd, weights
+
+
+def fit_surrogate_spectral(samples, weights, evals, mean, sd, order=2, num_draws=100000,
+                           seed=123):
+    """Fit the expansion by pseudo-spectral projection on the sparse grid."""
+    multi_indices = get_multi_indices(len(mean), order)
+
+    basis = get_basis(standardize(samples, mean, sd), multi_indices)
+    coeffs = np.dot(basis.T, weights * evals)
+
+    return get_surrogate(coeffs, multi_indices, mean, sd, num_draws, seed)
+
+
+def get_difference_design(mean, sd, step=0.5):
+    """Create the base point followed by the central-difference perturbations of each parameter.
+
+    The step is measured in standard deviations of the parameters, so the design has 2 * dim + 1
+    points.
+    """
+    offsets = np.eye(len(mean)) * step
+
+    return mean + np.vstack((np.zeros(len(mean)), offsets, -offsets)) * sd
+
+
+def fit_surrogate_delta(evals, mean, sd, step=0.5, cov=None, num_draws=100000, seed=123):
+    """Fit a linear expansion from the central differences on the difference design.
+
+    The coefficients of the first-order terms are the derivatives with respect to the
+    standardized parameters, so that the variance of the expansion is the one of the delta
+    method. The gradient with respect to the original parameters is stored as well. With a full
+    covariance matrix of the parameters, the linear expansion is normal with the variance of
+    the gradient under this matrix, and we set up its moments and quantiles accordingly.
+    """
+    dim = len(mean)
+    evals = np.asarray(evals, dtype=float)
+
+    derivatives = (evals[1 : dim + 1] - evals[dim + 1 :]) / (2 * step)
+    coeffs = np.concatenate(([evals[0]], derivatives))
+
+    surrogate = get_surrogate(coeffs, get_multi_indices(dim, 1), mean, sd, num_draws, seed)
+
+    # Parameters that are fixed in a reduced table have no effect.
+    sd = np.asarray(sd, dtype=float)
+    surrogate["gradient"] = np.divide(derivatives, sd, out=np.zeros(dim), where=sd != 0)
+
+    if cov is not None:
+        surrogate["variance"], _ = get_delta_contributions(surrogate["gradient"], cov)
+
+        np.random.seed(seed)
+        draws = np.sort(np.random.normal(size=num_draws))
+        surrogate["sorted"] = surrogate["expectation"] + np.sqrt(surrogate["variance"]) * draws
+
+    return surrogate
+
+
+def get_delta_contributions(gradient, cov):
+    """Compute the delta-method variance and the share of each parameter in it.
+
+    The shares are the products of the gradient and the covariance with the gradient, so that
+    they add up to one even if the parameters are correlated.
+    """
+    weighted = np.dot(cov, gradient)
+    variance = np.dot(gradient, weighted)
+
+    return variance, gradient * weighted / variance
+
+
+def get_surrogate(coeffs, multi_indices, mean, sd, num_draws, seed):
+    """Collect everything required to answer queries.
+
+    We precompute the moments and the sorted evaluations of the surrogate at random draws from
+    the input distribution, so that all later queries are only lookups.
+    """
+    surrogate = {
+        "coeffs": coeffs,
+        "multi_indices": multi_indices,
+        "mean": np.asarray(mean, dtype=float),
+        "sd": np.asarray(sd, dtype=float),
+        "expectation": coeffs[0],
+        "variance": np.sum(coeffs[1:] ** 2),
+    }
+
+    np.random.seed(seed)
+    draws = np.random.normal(size=(num_draws, len(mean)))
+    surrogate["sorted"] = np.sort(evaluate_surrogate(surrogate, draws, standardized=True))
+
+    return surrogate
+
+
+def evaluate_surrogate(surrogate, samples, standardized=False):
+    """Evaluate the surrogate at new points of shape (N, dim)."""
+    samples = np.atleast_2d(samples)
+    if not standardized:
+        samples = standardize(samples, surrogate["mean"], surrogate["sd"])
+
+    rslt = list()
+    for start in range(0, samples.shape[0], BLOCK_SIZE):
+        basis = get_basis(samples[start : start + BLOCK_SIZE], surrogate["multi_indices"])
+        rslt.append(np.dot(basis, surrogate["coeffs"]))
+
+    return np.concatenate(rslt)
+
+
+def get_surrogate_quantiles(surrogate, q):
+    """Look up quantiles of the quantity of interest under the input distribution."""
+    values = surrogate["sorted"]
+
+    # We interpolate linearly between the sorted evaluations, where the i-th of them is located
+    # at probability (i + 0.5) / n.
+    pos = np.clip(np.asarray(q) * len(values) - 0.5, 0, len(values) - 1)
+    lower = np.floor(pos).astype(int)
+    upper = np.minimum(lower + 1, len(values) - 1)
+
+    return values[lower] + (pos - lower) * (values[upper] - values[lower])
+
+
+def save_surrogate(surrogate, fname):
+
+    with open(fname, "wb") as outfile:
+        pkl.dump(surrogate, outfile)
+
+
+def load_surrogate(fname):
+
+    with open(fname, "rb") as infile:
+        return pkl.load(infile)
+
+
+def standardize(samples, mean, sd):
+
+    return (np.atleast_2d(samples) - mean) / sd
+
+
+def get_multi_indices(dim, order):
+    """Create all multi-indices with a total degree of at most order, sorted by degree."""
+    multi_indices = [np.zeros(dim, dtype=int)]
+    for degree in range(1, order + 1):
+        for combination in itertools.combinations_with_replacement(range(dim), degree):
+            multi_indices.append(np.bincount(combination, minlength=dim))
+
+    return np.array(multi_indices)
+
+
+def get_basis(z, multi_indices):
+    """Evaluate the orthonormal Hermite basis at standardized points of shape (N, dim)."""
+    order = multi_indices.max()
+
+    hermite = np.ones((order + 1,) + z.shape)
+    if order > 0:
+        hermite[1] = z
+    for degree in range(1, order):
+        hermite[degree + 1] = z * hermite[degree] - degree * hermite[degree - 1]
+    hermite /= np.sqrt([factorial(degree) for degree in range(order + 1)])[:, None, None]
+
+    basis = np.ones((z.shape[0], len(multi_indices)))
+    for dim in range(z.shape[1]):
+        basis *= hermite[multi_indices[:, dim], :, dim].T
+
+    return basis
@@ -0,0 +1,56 @@
+"""This module contains the instrumentation of the stages of our model evaluations.
+
+Each timed stage appends a record with its wall and CPU time and the process it ran in to a
+JSONL trace. The instrumentation is inactive unless a trace file is set with start_trace().
+"""
+from contextlib import contextmanager
+import json
+import time
+import os
+
+import pandas as pd
+
+TRACE = dict()
+
+
+def start_trace(fname):
+    """Activate the instrumentation in the current process."""
+    TRACE["fname"] = str(fname)
+
+
+@contextmanager
+def timed(stage):
+    """Record the wall and CPU time of a stage."""
+    if not TRACE:
+        yield
+        return
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        record = {
+            "stage": stage,
+            "wall": time.perf_counter() - start_wall,
+            "cpu": time.process_time() - start_cpu,
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+        }
+
+        # We write each record in a single call, so that the lines of concurrent processes do
+        # not interleave.
+        with open(TRACE["fname"], "a") as outfile:
+            outfile.write(json.dumps(record) + "\n")
+
+
+def get_timing_summary(fname):
+    """Aggregate the records of a trace by stage and by stage and worker."""
+    df = pd.read_json(fname, lines=True)
+
+    by_stage = df.groupby("stage")[["wall", "cpu"]].agg(["count", "sum", "mean"])
+    by_stage[("wall", "share")] = by_stage[("wall", "sum")] / by_stage[("wall", "sum")].sum()
+    by_stage = by_stage.sort_values(("wall", "sum"), ascending=False)
+
+    by_worker = df.pivot_table(index="pid", columns="stage", values="wall", aggfunc="sum")
+
+    return by_stage, by_worker